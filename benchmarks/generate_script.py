@@ -0,0 +1,189 @@
+"""
+Generates a script in the engine's schema for stress tests, optionally with placeholder
+images and audio for it so it plays without any real content.
+
+Run from the repo root with
+`python -m benchmarks.generate_script stress --steps 20000 --cast 40 --scenes 300 --assets`
+then play it with `python main.py stress` or `python -m benchmarks.story_playback stress`
+"""
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import json
+import math
+import wave
+import random
+import argparse
+from array import array
+
+import utils.tween_handler as Tween
+
+WORDS = ('the', 'club', 'poem', 'rain', 'window', 'today', 'just', 'really', 'maybe', 'you', 'we',
+         'should', 'write', 'something', 'about', 'cupcakes', 'festival', 'tomorrow', 'quiet', 'again',
+         'I', 'think', 'that', 'is', 'not', 'what', 'she', 'meant', 'okay', 'listen', 'words', 'page')
+EASINGS = tuple(Tween.EASE_STYLE)
+
+def make_line(rng: random.Random, length: int) -> str:
+    """
+    Words up to about length characters, length varies by 30% either way
+    """
+    target = max(1, int(length*rng.uniform(0.7, 1.3)))
+    words = []
+    size = -1
+    while size < target:
+        word = rng.choice(WORDS)
+        words.append(word)
+        size += len(word) + 1
+    return ' '.join(words).capitalize() + rng.choice('.!?')
+
+def generate(name: str, steps: int, cast: int, scenes: int, scene_every: float, line_length: int,
+             on_stage: int, personalities: int, audio_every: float, seed: int) -> dict:
+    """
+    A script whose story only ever adds actors off stage and talks to or removes actors on stage
+    """
+    rng = random.Random(seed)
+    root = f'assets/generated/{name}'
+    on_stage = max(1, min(on_stage, cast))
+
+    content: dict = {
+        'Scenes': [{'name': f'scene{i}', 'src': f'{root}/bg/scene{i}.png'} for i in range(scenes)],
+        'DialogueBoxes': [{'name': 'basic', 'src': f'{root}/ui/textbox.png', 'scale': [0.8, 1]}],
+        'Personalities': [],
+        'Characters': [{'name': f'actor{i}', 'src': f'{root}/sprite/actor{i}.png', 'ratio': 1} for i in range(cast)],
+    }
+    for i in range(personalities):
+        content['Personalities'].append({
+            'name': f'mood{i}',
+            'diag_easing': rng.choice(EASINGS),
+            'diag_easelen': round(rng.uniform(0.2, 0.8), 2),
+            'diag_offset': [rng.randint(-60, 60), 0],
+            'char_easing': rng.choice(EASINGS),
+            'char_easelen': round(rng.uniform(0.2, 0.8), 2),
+            'char_offset': [0, rng.randint(-80, 0)],
+            'text_delay': -1,
+            'font': 'aller',
+            'font_size': rng.choice((24, 28, 32)),
+            'talk_sound': f'{root}/audio/talk.wav',
+        })
+
+    stage = [f'actor{i}' for i in range(min(on_stage, cast))]
+    content['Setup'] = {
+        'background': 'scene0',
+        'characters': [{'name': v, 'dialoguebox': 'basic'} for v in stage],
+        'bgaudio': f'{root}/audio/theme0.wav',
+    }
+
+    story = []
+    for _ in range(steps):
+        step: dict = {'background_change': '', 'char_add': [], 'char_remove': [], 'bgaudio_change': ''}
+        if rng.random() < 1/scene_every:
+            step['background_change'] = f'scene{rng.randrange(scenes)}'
+        if rng.random() < 1/audio_every:
+            step['bgaudio_change'] = f'{root}/audio/theme{rng.randrange(2)}.wav'
+
+        # swap someone out now and then, keeping at least one actor up
+        if cast > 1 and rng.random() < 0.15:
+            if len(stage) > 1 and (len(stage) >= on_stage or rng.random() < 0.5):
+                leaving = rng.choice(stage)
+                stage.remove(leaving)
+                step['char_remove'].append(leaving)
+            offstage = [f'actor{i}' for i in range(cast) if f'actor{i}' not in stage and f'actor{i}' not in step['char_remove']]
+            if offstage and len(stage) < on_stage:
+                joining = rng.choice(offstage)
+                stage.append(joining)
+                step['char_add'].append({'name': joining, 'dialoguebox': 'basic', 'direction': rng.choice(('left', 'right'))})
+
+        step['char_talk'] = rng.choice(stage)
+        step['char_personality'] = f'mood{rng.randrange(personalities)}'
+        step['talk_content'] = make_line(rng, line_length)
+        story.append(step)
+    content['Story'] = story
+    return content
+
+def write_tone(path: str, seconds: float, frequency: float, volume: float = 0.2):
+    rate = 22050
+    samples = array('h', (int(32767*volume*math.sin(2*math.pi*frequency*i/rate)) for i in range(int(rate*seconds))))
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(samples.tobytes())
+
+def write_assets(content: dict, scene_size: tuple[int, int], actor_size: tuple[int, int], audio_seconds: float, seed: int):
+    """
+    Placeholder images and audio for every path the script uses
+    """
+    import pygame
+    pygame.init()
+    font = pygame.font.SysFont(None, 64)
+    rng = random.Random(seed)
+
+    def gradient(size: tuple[int, int], alpha: bool) -> pygame.Surface:
+        corners = pygame.Surface((2, 2), pygame.SRCALPHA if alpha else 0)
+        for x in range(2):
+            for y in range(2):
+                corners.set_at((x, y), (rng.randrange(256), rng.randrange(256), rng.randrange(256), 255))
+        return pygame.transform.smoothscale(corners, size)
+
+    def save(surface: pygame.Surface, path: str, label: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        surface.blit(font.render(label, True, (255, 255, 255)), (16, 16))
+        pygame.image.save(surface, path)
+
+    for scene in content['Scenes']:
+        save(gradient(scene_size, False), scene['src'], scene['name'])
+    for char in content['Characters']:
+        # a rounded body on a transparent sheet, so alpha blending costs what a real sprite does
+        surface = pygame.Surface(actor_size, pygame.SRCALPHA)
+        w, h = actor_size
+        pygame.draw.ellipse(surface, (rng.randrange(256), rng.randrange(256), rng.randrange(256)), (w//4, 0, w//2, h//3))
+        pygame.draw.rect(surface, (rng.randrange(256), rng.randrange(256), rng.randrange(256)), (w//8, h//3, w*3//4, h*2//3), border_radius=w//8)
+        save(surface, char['src'], char['name'])
+    for box in content['DialogueBoxes']:
+        surface = pygame.Surface((1200, 260), pygame.SRCALPHA)
+        pygame.draw.rect(surface, (255, 230, 240, 230), surface.get_rect(), border_radius=24)
+        save(surface, box['src'], '')
+
+    audio = {v['talk_sound'] for v in content['Personalities']}
+    os.makedirs(os.path.dirname(content['Setup']['bgaudio']), exist_ok=True)
+    for path in sorted(audio):
+        write_tone(path, 0.05, 880)
+    root = os.path.dirname(content['Setup']['bgaudio'])
+    for i in range(2):
+        write_tone(f'{root}/theme{i}.wav', audio_seconds, 220*(i+1), 0.05)
+
+def size_arg(value: str) -> tuple[int, int]:
+    w, h = value.lower().split('x')
+    return (int(w), int(h))
+
+def main():
+    parser = argparse.ArgumentParser(description='Generates a synthetic script for stress tests')
+    parser.add_argument('name', help='written to ./scripts/<name>.json, assets to ./assets/generated/<name>')
+    parser.add_argument('--steps', type=int, default=10000, help='story steps')
+    parser.add_argument('--cast', type=int, default=24, help='characters')
+    parser.add_argument('--scenes', type=int, default=100)
+    parser.add_argument('--scene-every', type=float, default=12, help='average steps between background changes')
+    parser.add_argument('--audio-every', type=float, default=200, help='average steps between music changes')
+    parser.add_argument('--line-length', type=int, default=90, help='average characters per line')
+    parser.add_argument('--on-stage', type=int, default=3, help='most actors on stage at once')
+    parser.add_argument('--personalities', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--assets', action='store_true', help='also write placeholder images and audio')
+    parser.add_argument('--scene-size', type=size_arg, default=(1920, 1080))
+    parser.add_argument('--actor-size', type=size_arg, default=(600, 1200))
+    parser.add_argument('--audio-seconds', type=float, default=5)
+    args = parser.parse_args()
+
+    content = generate(args.name, args.steps, args.cast, args.scenes, args.scene_every, args.line_length,
+                       args.on_stage, args.personalities, args.audio_every, args.seed)
+    path = f'./scripts/{args.name}.json'
+    with open(path, 'w') as f:
+        json.dump(content, f)
+    print(f'wrote {path}: {len(content["Story"])} steps, {len(content["Characters"])} characters, {len(content["Scenes"])} scenes')
+
+    if args.assets:
+        write_assets(content, args.scene_size, args.actor_size, args.audio_seconds, args.seed)
+        print(f'wrote placeholder assets to ./assets/generated/{args.name}')
+
+if __name__ == '__main__':
+    main()
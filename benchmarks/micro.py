@@ -0,0 +1,274 @@
+"""
+Micro-benchmarks of the hot paths: TextUI.set_text, tween_handler.update_all (plain and vectorized),
+ui_handler.update_all, AudioSystem._play, AnimatableSprite.update_rect_size and sprite_handler.update_all.
+
+Every case is timed in --repeats samples of at least --min-time seconds and reported as
+operations per second with the spread between samples.
+
+Run from the repo root with `python -m benchmarks.micro [--only text] [--json out.json]`
+"""
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import io
+import json
+import time
+import wave
+import random
+import argparse
+import statistics
+import typing
+
+import pygame
+
+pygame.init()
+pygame.display.set_mode((800, 450))
+
+import utils.ui_handler as UIEng
+import utils.tween_handler as Tween
+import utils.sound_handler as SoundEng
+import utils.sprite_handler as SpriteEng
+import utils.asset_handler as AssetEng
+
+# name -> setup, the setup builds its state and returns the operation and how many ops one call does
+CASES: dict[str, typing.Callable[[], tuple[typing.Callable[[], None], int]]] = {}
+
+def case(name: str):
+    def register(setup):
+        CASES[name] = setup
+        return setup
+    return register
+
+def reset_ui():
+    UIEng.UIOBJ.clear()
+    UIEng.RENDER_STACK.clear()
+    UIEng._GRID.clear()
+    UIEng.HOVERED.clear()
+    UIEng._DAMAGE.clear()
+
+# --- TextUI.set_text
+TEXT = ('Just Monika. Just Monika. The club room is quiet today, and the rain taps on the window '
+        'while everyone pretends to be busy with their poems. ')
+
+def text_case(length: int, border: int):
+    def setup():
+        reset_ui()
+        render = pygame.Surface((800, 450))
+        text = UIEng.TextUI(pygame.Rect(0, 0, 640, 200), render, pygame.font.SysFont(None, 24))
+        text.set_border(border)
+        source = (TEXT*(length//len(TEXT) + 1))[:length]
+        counter = [0]
+        def op():
+            # a new line every call like the story, nothing comes from the layout or outline caches
+            counter[0] += 1
+            text.set_text(f'{source[:-6]} {counter[0]:05d}')
+        return op, 1
+    return setup
+
+for length in (20, 120, 600):
+    for border in (0, 1, 3):
+        case(f'text.set_text len={length} border={border}')(text_case(length, border))
+
+# --- tween_handler.update_all
+def tween_case(vectorized: bool):
+    def setup():
+        Tween.TWEENS.clear()
+        Tween.POOLS.clear()
+        Tween.clear_loops()
+        Tween.use_vectorized(vectorized)
+        # long enough to never finish while timing
+        for i in range(2500):
+            Tween.Tween(1e9, 1, 0, 'ease_out_quad', lambda v: None)
+            Tween.TweenTuple(1e9, [1, 1], [0, 0], 'elastic', lambda v: None)
+        for i in range(5000):
+            Tween.Loop(1/30, lambda c: None)
+        Tween.use_vectorized(False)
+        def op():
+            Tween.update_all(1/60)
+        return op, 1
+    return setup
+
+case('tween.update_all 10k (5k tweens, 5k loops)')(tween_case(False))
+if Tween.np is not None:
+    case('tween.update_all 10k vectorized')(tween_case(True))
+
+class Tweened:
+    def __init__(self) -> None:
+        self.PxPos = (0, 0)
+        self.Opacity = 0.0
+
+def property_case(vectorized: bool):
+    def setup():
+        Tween.TWEENS.clear()
+        Tween.POOLS.clear()
+        Tween.clear_loops()
+        Tween.use_vectorized(vectorized)
+        # how the dialogue moves things, a position and a scalar on every object
+        for i in range(2500):
+            obj = Tweened()
+            Tween.TweenProperty(1e9, (100, 50), obj, 'PxPos', None, 'ease_out_quad')
+            Tween.TweenProperty(1e9, 1.0, obj, 'Opacity', None, 'elastic')
+        Tween.use_vectorized(False)
+        def op():
+            Tween.update_all(1/60)
+        return op, 1
+    return setup
+
+case('tween.update_all 5k property tweens')(property_case(False))
+if Tween.np is not None:
+    case('tween.update_all 5k property tweens vectorized')(property_case(True))
+
+@case('tween.update_all 10k timers, 1% due each frame')
+def timer_update():
+    Tween.TWEENS.clear()
+    Tween.POOLS.clear()
+    Tween.clear_loops()
+    rng = random.Random(1)
+    # spread over 60 to 180 frames so about 1% fire in any frame
+    for i in range(10000):
+        Tween.Loop(rng.uniform(1, 3), lambda c: None)
+    def op():
+        Tween.update_all(1/60)
+    return op, 1
+
+# --- ui_handler.update_all
+@case('ui.update_all 1k elements, 32 mouse events')
+def ui_update():
+    reset_ui()
+    UIEng.set_dirty_rects(False)
+    render = pygame.Surface((800, 450))
+    rng = random.Random(1)
+    for i in range(1000):
+        ui = UIEng.UI(render.get_rect(), render, pygame.Rect(0, 0, rng.randint(8, 64), rng.randint(8, 64)))
+        ui.Surface.fill((rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255)))
+        ui.position((rng.random(), rng.random()))
+        ui.ZIndex = rng.randint(-10, 10)
+        if i % 4 == 0:
+            ui._onclick(UIEng.UI_Event(lambda: None))
+            ui._onhover(UIEng.UI_Event(lambda: None))
+    points = [(rng.randint(0, 799), rng.randint(0, 449)) for _ in range(64)]
+    events = []
+    for p in points[:16]:
+        events.append(pygame.event.Event(pygame.MOUSEMOTION, pos=p, rel=(1, 1), buttons=(0, 0, 0)))
+        events.append(pygame.event.Event(pygame.MOUSEBUTTONUP, pos=p, button=1))
+    frame = [0]
+    def op():
+        frame[0] += 1
+        UIEng.update_all(events, points[frame[0] % len(points)])
+    return op, 1
+
+# --- AudioSystem._play
+def silent_wav(seconds: float) -> bytes:
+    data = io.BytesIO()
+    with wave.open(data, 'wb') as f:
+        f.setnchannels(2)
+        f.setsampwidth(2)
+        f.setframerate(22050)
+        f.writeframes(bytes(int(22050*seconds)*4))
+    return data.getvalue()
+
+@case('audio._play+_stop, 63 of 64 channels busy')
+def audio_play():
+    system = SoundEng.AudioSystem(64)
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '_silence.wav')
+    with open(path, 'wb') as f:
+        f.write(silent_wav(2))
+    try:
+        busy = [system.Load(path) for _ in range(63)]
+        sound = system.Load(path)
+    finally:
+        os.remove(path)
+    for v in busy:
+        v.Play(loop=True)
+    def op():
+        system._play(sound, 1.0, False, None)
+        system._stop(sound)
+    return op, 1
+
+# --- AnimatableSprite.update_rect_size
+def sprite_case(tracks: int):
+    def setup():
+        reset_ui()
+        render = pygame.Surface((800, 450))
+        AssetEng.ASSETS.put('bench/actor.png', pygame.Surface((400, 800), pygame.SRCALPHA))
+        AssetEng.ASSETS.put('bench/sheet.png', pygame.Surface((512, 512), pygame.SRCALPHA))
+        sprite = SpriteEng.AnimatableSprite(render.get_rect(), render, 'bench/actor.png')
+        for i in range(tracks):
+            sprite.load_track('bench/sheet.png', f'track{i}', (128, 128), (4, 4), 1)
+        sizes = [sprite.Mips.get((200, 400)), sprite.Mips.get((220, 440))]
+        frame = [0]
+        def op():
+            frame[0] += 1
+            sprite.Surface = sizes[frame[0] % 2]
+            sprite.update_rect_size()
+        return op, 1
+    return setup
+
+for tracks in (1, 8, 32):
+    case(f'sprite.update_rect_size tracks={tracks}')(sprite_case(tracks))
+
+# --- sprite_handler.update_all
+@case('sprite.update_all 500 animations')
+def sprite_update():
+    reset_ui()
+    SpriteEng.ANIMOBJ.clear()
+    render = pygame.Surface((800, 450))
+    AssetEng.ASSETS.put('bench/actor.png', pygame.Surface((64, 64), pygame.SRCALPHA))
+    AssetEng.ASSETS.put('bench/sheet.png', pygame.Surface((512, 512), pygame.SRCALPHA))
+    rng = random.Random(1)
+    for i in range(500):
+        sprite = SpriteEng.AnimatableSprite(render.get_rect(), render, 'bench/actor.png')
+        # 8 to 24 frames a second against 60 updates, with a few looping forever in effect
+        track = sprite.load_track('bench/sheet.png', 'idle', (128, 128), (4, 4), rng.uniform(16/24, 2))
+        track.play_animation(10**9)
+    def op():
+        SpriteEng.update_all(1/60)
+    return op, 1
+
+def measure(setup, repeats: int, min_time: float) -> dict[str, float]:
+    op, ops = setup()
+    op() # warm up
+    samples = []
+    for _ in range(repeats):
+        calls = 0
+        start = time.perf_counter()
+        elapsed = 0.0
+        while elapsed < min_time:
+            op()
+            calls += 1
+            elapsed = time.perf_counter() - start
+        samples.append(calls*ops/elapsed)
+    mean = statistics.mean(samples)
+    stdev = statistics.stdev(samples) if len(samples) > 1 else 0.0
+    return {
+        'ops_per_sec': mean,
+        'stdev': stdev,
+        'rel_stdev': stdev/mean if mean else 0.0,
+        'min': min(samples),
+        'max': max(samples),
+        'samples': len(samples),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Subsystem micro-benchmarks')
+    parser.add_argument('--only', default='', help='only run cases whose name contains this')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.2, help='seconds per sample')
+    parser.add_argument('--json', default=None, help='write the results here')
+    args = parser.parse_args()
+
+    results = {}
+    print(f'{"case":<46} {"ops/s":>12} {"+-":>8} {"min":>12} {"max":>12}')
+    for name, setup in CASES.items():
+        if args.only not in name:
+            continue
+        result = results[name] = measure(setup, args.repeats, args.min_time)
+        print(f'{name:<46} {result["ops_per_sec"]:>12.1f} {result["rel_stdev"]:>7.1%} {result["min"]:>12.1f} {result["max"]:>12.1f}')
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Compares the retained render list in ui_handler.update_all against the old
+sort-every-frame path.
+
+Run from the repo root with `python -m benchmarks.render_list [counts...]`
+"""
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import sys
+import time
+import random
+import pygame
+
+pygame.init()
+pygame.display.set_mode((800, 400))
+
+import utils.ui_handler as UIEng
+
+FRAMES = 120
+
+def legacy_update_states(v: UIEng.UI, event: list[pygame.event.Event], mousepos: tuple[int, int]):
+    # the previous per element UI._update_states
+    collided = v.Bounds.collidepoint(mousepos)
+    if not v.Hovering and collided:
+        v.Hovering = True
+        v.trigger_event('onhover')
+    elif not collided:
+        if v.Hovering:
+            v.trigger_event('onleave')
+        v.Hovering = False
+
+    active = False
+    if collided:
+        for ev in event:
+            if ev.type == pygame.MOUSEBUTTONUP:
+                v.trigger_event('onclick')
+                active = True
+    v.Active = active
+
+def legacy_update_all(Event: list[pygame.event.Event], MousePos: tuple[int, int]):
+    # the previous update_all: sort everything, one blit per element
+    sort_stack = list(UIEng.UIOBJ.values())
+    sort_stack.sort(key=lambda ui: ui.ZIndex)
+
+    for v in sort_stack:
+        v.ParentSurface.blit(*v.get_blit())
+        legacy_update_states(v, Event, MousePos)
+        v.position()
+
+def build_scene(count: int) -> pygame.Surface:
+    UIEng.UIOBJ.clear()
+    UIEng.RENDER_STACK.clear()
+    UIEng._GRID.clear()
+    UIEng.HOVERED.clear()
+    render = pygame.Surface((800, 400))
+    rng = random.Random(count)
+    for i in range(count):
+        ui = UIEng.UI(render.get_rect(), render, pygame.Rect(0, 0, rng.randint(8, 64), rng.randint(8, 64)))
+        ui.Surface.fill((rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255)))
+        ui.position((rng.random(), rng.random()))
+        ui.ZIndex = rng.randint(-10, 10)
+    return render
+
+def run(update, count: int) -> float:
+    build_scene(count)
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        update([], (400, 200))
+    return (time.perf_counter() - start) / FRAMES * 1000
+
+def main():
+    counts = [int(v) for v in sys.argv[1:]] or [100, 1000, 5000]
+    print(f"{'elements':>10} {'legacy ms':>12} {'retained ms':>12} {'speedup':>8}")
+    for count in counts:
+        legacy = run(legacy_update_all, count)
+        retained = run(UIEng.update_all, count)
+        print(f'{count:>10} {legacy:>12.3f} {retained:>12.3f} {legacy/retained:>7.2f}x')
+
+if __name__ == '__main__':
+    main()
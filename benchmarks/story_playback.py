@@ -0,0 +1,288 @@
+"""
+Plays a script from scripts/ start to finish without a window, with a fixed dt and a
+click on the dialogue box every --click-every simulated seconds. Reports startup time,
+frame time percentiles, per phase cost, peak RSS and asset load time as JSON, and can
+compare them against a stored baseline.
+
+Every run is a fresh process, the numbers are the median over --runs. With no script
+given it plays DEFAULT_SCRIPT, generated with placeholder assets on first use so it runs
+from a clean checkout.
+
+Run from the repo root with
+`python -m benchmarks.story_playback [script] [--runs N] [--out results.json]
+[--save-baseline baseline.json] [--baseline baseline.json --tolerance 0.1]`
+exits with 1 when a metric regressed past the tolerance.
+"""
+import time
+_T0 = time.perf_counter()
+
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+import typing
+
+import pygame
+
+pygame.init()
+
+import utils.sound_handler as SoundEng
+import utils.ui_handler as UIEng
+import utils.tween_handler as Tween
+import utils.sprite_handler as SpriteEng
+import utils.asset_handler as AssetEng
+import utils.prefetch_handler as PrefetchEng
+import utils.display_handler as DisplayEng
+import utils.profile_handler as ProfileEng
+
+import src.dialogue as DialogueHandler
+import src.story as StoryEng
+
+# metrics compared against a baseline, all lower is better
+COMPARED = ('startup_ms', 'asset_load_ms', 'peak_rss_mb', 'frame_ms.mean', 'frame_ms.p95', 'frame_ms.p99')
+# differences smaller than this (ms or MB) are noise no matter the percentage
+MIN_DELTA = 0.1
+
+# played when no script is given, see generate_default
+DEFAULT_SCRIPT = 'benchmark_playback'
+
+def peak_rss_mb() -> typing.Union[float, None]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on linux, bytes on macos
+    return rss/(1024*1024) if sys.platform == 'darwin' else rss/1024
+
+def percentiles(values: list[float]) -> dict[str, float]:
+    values = sorted(values)
+    pick = lambda q: values[min(int(q*len(values)), len(values)-1)]
+    return {
+        'mean': sum(values)/len(values),
+        'p50': pick(0.5),
+        'p95': pick(0.95),
+        'p99': pick(0.99),
+        'max': values[-1],
+    }
+
+def play(script: str, size: tuple[int, int], dt: float, click_every: float, max_frames: int, lazy: bool) -> dict:
+    """
+    Plays script once in this process, returns the metrics
+    """
+    presenter = DisplayEng.Presenter(size)
+    audio = SoundEng.AudioSystem()
+    DialogueHandler.initialize(size, presenter.Render, audio)
+    with open(f'./scripts/{script}.json', 'r') as f:
+        content = json.load(f)
+
+    prefetch = PrefetchEng.Prefetcher()
+    story = StoryEng.Story(content, size, prefetch, lazy)
+    story.load(f'benchmark {script}')
+    UIEng.update_all([], (0, 0))
+    presenter.present()
+    startup = time.perf_counter() - _T0
+
+    profiler = ProfileEng.FrameProfiler(max_frames)
+    ProfileEng.PROFILER = profiler
+    profiler.enable()
+
+    frame_times = []
+    since_click = 0.0
+    while story.Running and len(frame_times) < max_frames:
+        start = time.perf_counter()
+        profiler.begin_frame()
+        prefetch.pump()
+        events = pygame.event.get()
+        # the pointer rests on the dialogue box like a player reading along
+        pointer = DialogueHandler.ACTIVE_DIALOGUE[0].Bounds.center if DialogueHandler.ACTIVE_DIALOGUE else (0, 0)
+        since_click += dt
+        if since_click >= click_every:
+            since_click = 0.0
+            events.append(pygame.event.Event(pygame.MOUSEBUTTONUP, pos=pointer, button=1))
+        profiler.mark('events')
+        Tween.update_all(dt)
+        profiler.mark('tween')
+        SpriteEng.update_all(dt)
+        profiler.mark('sprite')
+        updated = UIEng.update_all(events, pointer)
+        presenter.present(updated)
+        profiler.end_frame()
+        frame_times.append((time.perf_counter() - start)*1000)
+    prefetch.shutdown()
+
+    return {
+        'script': script,
+        'size': list(size),
+        'dt': dt,
+        'completed': not story.Running,
+        'steps': story.StepsTaken,
+        'frames': len(frame_times),
+        'startup_ms': startup*1000,
+        'asset_load_ms': AssetEng.ASSETS.LoadTime*1000,
+        'peak_rss_mb': peak_rss_mb(),
+        'frame_ms': percentiles(frame_times) if frame_times else {},
+        'phase_ms': profiler.summary(),
+    }
+
+def flatten(result: dict, prefix: str = '') -> dict[str, typing.Any]:
+    flat = {}
+    for k, v in result.items():
+        if isinstance(v, dict):
+            flat.update(flatten(v, f'{prefix}{k}.'))
+        else:
+            flat[f'{prefix}{k}'] = v
+    return flat
+
+def unflatten(flat: dict[str, typing.Any]) -> dict:
+    result: dict = {}
+    for k, v in flat.items():
+        node = result
+        *path, leaf = k.split('.')
+        for part in path:
+            node = node.setdefault(part, {})
+        node[leaf] = v
+    return result
+
+def median_of(results: list[dict]) -> dict:
+    """
+    Median of every numeric metric over the runs, anything else from the first run
+    """
+    flats = [flatten(v) for v in results]
+    merged = {}
+    for k, v in flats[0].items():
+        values = [f[k] for f in flats if isinstance(f.get(k), (int, float)) and not isinstance(f.get(k), bool)]
+        if not values or len(values) != len(flats):
+            merged[k] = v
+        elif all(isinstance(x, int) for x in values):
+            # counts stay whole
+            merged[k] = statistics.median_low(values)
+        else:
+            merged[k] = statistics.median(values)
+    merged['runs'] = len(results)
+    return unflatten(merged)
+
+def compare(result: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Metrics worse than the baseline by more than tolerance, as printable lines
+    """
+    current, base = flatten(result), flatten(baseline)
+    regressions = []
+    print(f'{"metric":>16} {"baseline":>10} {"current":>10} {"change":>8}')
+    for k in COMPARED:
+        if not isinstance(current.get(k), (int, float)) or not isinstance(base.get(k), (int, float)):
+            continue
+        change = (current[k] - base[k])/base[k] if base[k] else 0.0
+        flag = ''
+        if change > tolerance and current[k] - base[k] > MIN_DELTA:
+            flag = ' REGRESSED'
+            regressions.append(f'{k} {base[k]:.3f} -> {current[k]:.3f} ({change:+.1%})')
+        print(f'{k:>16} {base[k]:>10.3f} {current[k]:>10.3f} {change:>+8.1%}{flag}')
+    return regressions
+
+def generate_default():
+    """
+    Writes DEFAULT_SCRIPT and its placeholder assets with generate_script, unless already there
+    """
+    if os.path.exists(f'./scripts/{DEFAULT_SCRIPT}.json'):
+        return
+    from benchmarks import generate_script
+    content = generate_script.generate(DEFAULT_SCRIPT, steps=400, cast=8, scenes=20, scene_every=12, line_length=90,
+                                       on_stage=3, personalities=4, audio_every=200, seed=1)
+    generate_script.write_assets(content, (1920, 1080), (600, 1200), 5, 1)
+    with open(f'./scripts/{DEFAULT_SCRIPT}.json', 'w') as f:
+        json.dump(content, f)
+    print(f'generated {DEFAULT_SCRIPT} with placeholder assets')
+
+def missing_assets(script: str) -> list[str]:
+    """
+    Files the script points at that are not on disk
+    """
+    with open(f'./scripts/{script}.json', 'r') as f:
+        content = json.load(f)
+    paths: set[str] = set()
+    def walk(value: typing.Any):
+        if isinstance(value, dict):
+            for v in value.values():
+                walk(v)
+        elif isinstance(value, list):
+            for v in value:
+                walk(v)
+        elif isinstance(value, str) and value.startswith(('assets/', './assets/')):
+            paths.add(value)
+    walk(content)
+    return sorted(v for v in paths if not os.path.exists(v))
+
+def run_once(args: argparse.Namespace) -> dict:
+    command = [sys.executable, '-m', 'benchmarks.story_playback', args.script, '--single',
+               '--size', args.size, '--dt', str(args.dt), '--click-every', str(args.click_every),
+               '--max-frames', str(args.max_frames)]
+    if args.eager:
+        command.append('--eager')
+    proc = subprocess.run(command, capture_output=True, text=True)
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        print(proc.stdout, proc.stderr, sep='\n', file=sys.stderr)
+        raise SystemExit(f'benchmark run failed with {proc.returncode}')
+    # the engine prints too, the result is the last line
+    return json.loads(lines[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description='Headless story playback benchmark')
+    parser.add_argument('script', nargs='?', default=DEFAULT_SCRIPT, help='script name in ./scripts, without .json')
+    parser.add_argument('--size', default='800x450', help='render resolution, WIDTHxHEIGHT')
+    parser.add_argument('--dt', type=float, default=1/60, help='simulated seconds per frame')
+    parser.add_argument('--click-every', type=float, default=1.5, help='simulated seconds between clicks')
+    parser.add_argument('--max-frames', type=int, default=100000)
+    parser.add_argument('--eager', action='store_true', help='load every scene and character up front')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--out', default=None, help='write the results here')
+    parser.add_argument('--save-baseline', default=None, help='write the results as a baseline here')
+    parser.add_argument('--baseline', default=None, help='compare against this baseline')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='allowed slowdown, 0.1 is 10%%')
+    parser.add_argument('--single', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        width, height = (int(v) for v in args.size.lower().split('x'))
+        result = play(args.script, (width, height), args.dt, args.click_every, args.max_frames, not args.eager)
+        print(json.dumps(result))
+        return
+
+    if args.script == DEFAULT_SCRIPT:
+        generate_default()
+    if not os.path.exists(f'./scripts/{args.script}.json'):
+        raise SystemExit(f'no script ./scripts/{args.script}.json')
+    missing = missing_assets(args.script)
+    if missing:
+        print(f'{args.script} needs assets that are not in this checkout:', *missing, sep='\n  ', file=sys.stderr)
+        raise SystemExit(1)
+
+    result = median_of([run_once(args) for _ in range(args.runs)])
+    frame = result['frame_ms']
+    print(f'{args.script}: {result["frames"]} frames, {result["steps"]} steps, completed {result["completed"]}')
+    print(f'startup {result["startup_ms"]:.1f}ms  asset load {result["asset_load_ms"]:.1f}ms  peak rss {result["peak_rss_mb"]}MB')
+    print(f'frame ms mean {frame["mean"]:.3f} p50 {frame["p50"]:.3f} p95 {frame["p95"]:.3f} p99 {frame["p99"]:.3f} max {frame["max"]:.3f}')
+    for name, stats in result['phase_ms'].items():
+        print(f'  {name:>9} mean {stats["mean"]:.3f} p95 {stats["p95"]:.3f}')
+
+    for path in (args.out, args.save_baseline):
+        if path:
+            with open(path, 'w') as f:
+                json.dump(result, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.tolerance)
+        if regressions:
+            print('regressions:', *regressions, sep='\n  ')
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -1,20 +1,33 @@
 import pygame
 import sys
 import json
+import os
 import time
+import typing
 
 pygame.init()
 
 import utils.sound_handler as SoundEng
 import utils.ui_handler as UIEng
 import utils.tween_handler as Tween
+import utils.sprite_handler as SpriteEng
+import utils.asset_handler as AssetEng
+import utils.prefetch_handler as PrefetchEng
+import utils.pack_handler as PackEng
+import utils.display_handler as DisplayEng
+import utils.profile_handler as ProfileEng
+import utils.replay_handler as ReplayEng
 
 import src.dialogue as DialogueHandler
+import src.story as StoryEng
 import cProfile
 import pstats
 
+# whole session cProfile, printed on quit. --cprofile
+CPROFILE = '--cprofile' in sys.argv
 profiler = cProfile.Profile()
-profiler.enable()
+if CPROFILE:
+    profiler.enable()
 
 # global variables
 SCR_HEIGHT = 400
@@ -32,9 +45,51 @@ VERSION = 'v1.1'
 TIMER: pygame.time.Clock = None #type: ignore
 WINDOW: pygame.surface.Surface = None #type: ignore
 FPS = 120
+# let the player resize the window, the stage is laid out again for the new size
+RESIZABLE_WINDOW = False
+# seconds of work per frame, the render resolution drops (down to MIN_RES_SCALE) to hold it. None keeps RES_SCALE
+FRAME_BUDGET: typing.Union[float, None] = None
+MIN_RES_SCALE = 0.5
+# sleep in pygame.event.wait while nothing is animating or changed, waking at least every IDLE_TIMEOUT ms
+IDLE_MODE = True
+IDLE_TIMEOUT = 250
+# per phase frame timings, --profile or F3 toggles them with the graph overlay, F4 exports them
+PROFILE_FRAMES = '--profile' in sys.argv
+PROFILE_EXPORT = 'frame_profile' # .json and .csv are written here on F4 and on quit
+# only redraw and present regions that changed, see UIEng.set_dirty_rects
+DIRTY_RENDERING = False
+# load scenes and characters on first use, and decode the next PREFETCH_DEPTH story steps in the background
+LAZY_LOADING = True
+PREFETCH_DEPTH = 8
+# update tweens, loops and animations TICK_RATE times a second whatever the frame rate, drawing tweened
+# positions between the last two updates. None updates once a frame with its dt. at most MAX_STEPS a frame
+TICK_RATE: typing.Union[float, None] = None
+MAX_STEPS = 5
+# keep tweens in numpy arrays and ease them a style at a time, for thousands of tweens. needs numpy
+VECTOR_TWEENS = False
+# load images from scripts/<script>.pack when baked, python -m utils.pack_handler <script> --size WxH
+USE_PACK = True
+
+def arg_value(flag: str) -> typing.Union[str, None]:
+    if flag in sys.argv and sys.argv.index(flag)+1 < len(sys.argv):
+        return sys.argv[sys.argv.index(flag)+1]
+    return None
+
+# write every frame's events, dt and pointer to a file, --record <file>
+RECORD_PATH = arg_value('--record')
+# play a recording back with its clock instead of the real one, --replay <file>
+REPLAY_PATH = arg_value('--replay')
 
 SCRIPT = sys.argv[1]
-_running = True
+REPLAYER: typing.Union[ReplayEng.Replayer, None] = None
+RECORDER: typing.Union[ReplayEng.Recorder, None] = None
+if REPLAY_PATH:
+    REPLAYER = ReplayEng.Replayer(REPLAY_PATH)
+    if REPLAYER.Header.get('script') != SCRIPT:
+        print(f'{REPLAY_PATH} was recorded with {REPLAYER.Header.get("script")}, not {SCRIPT}')
+if RECORD_PATH or REPLAY_PATH:
+    # the resolution would follow the wall clock
+    FRAME_BUDGET = None
 
 # initial setup
 DisplayInfo = pygame.display.Info()
@@ -42,123 +97,168 @@ print(DisplayInfo)
 
 SCR_HEIGHT = int(DisplayInfo.current_h*SCR_SCALE)
 SCR_WIDTH = int(DisplayInfo.current_w*SCR_SCALE)
+if REPLAYER:
+    SCR_WIDTH, SCR_HEIGHT = REPLAYER.Header.get('window')
 RES_HEIGHT = int(SCR_HEIGHT*RES_SCALE)
 RES_WIDTH = int(SCR_WIDTH*RES_SCALE)
 
-WINDOW = pygame.display.set_mode((SCR_WIDTH, SCR_HEIGHT))
+PRESENTER = DisplayEng.Presenter((SCR_WIDTH, SCR_HEIGHT), RES_SCALE, pygame.RESIZABLE if RESIZABLE_WINDOW else 0, FRAME_BUDGET, MIN_RES_SCALE)
+WINDOW = PRESENTER.Window
+RENDER = PRESENTER.Render
 TIMER = pygame.time.Clock()
 
-RENDER = pygame.Surface((RES_WIDTH, RES_HEIGHT))
-
 AUDIO_ENG = SoundEng.AudioSystem()
 DialogueHandler.initialize((RES_WIDTH, RES_HEIGHT), RENDER, AUDIO_ENG)
 
 with open(f'./scripts/{SCRIPT}.json', 'r') as f:
     SCRIPT_CONTENT = json.load(f)
 
+PACK_PATH = f'./scripts/{SCRIPT}.pack'
+if USE_PACK and os.path.exists(PACK_PATH):
+    try:
+        pack = PackEng.Pack(PACK_PATH)
+        if pack.Resolution != (RES_WIDTH, RES_HEIGHT):
+            print(f'{PACK_PATH} was baked for {pack.Resolution}, images will be rescaled')
+        if not pack.Native:
+            print(f'{PACK_PATH} was baked for a {pack.Format or "unknown"} {pack.ByteOrder} endian display, images will be converted')
+        AssetEng.ASSETS.mount(pack)
+    except Exception as e:
+        print(f'exception at loading pack {e}')
+
 # Here we go bois bish bash bosh
 
 # --- MAIN LOGIC
-DialogueHandler.define_dialogue_box('assets/ui/textbox.png', '_intro', (0.8, 1))
-DialogueHandler.switch_dialogue_box('_intro')
-DialogueHandler.get_dialogue_box('_intro')[1].set_text(f'DokiPy {VERSION} loaded {SCRIPT} Press dialogue box to start. DEMO')
-
-def move_script():
-    if len(SCRIPT_CONTENT['Story']) == 0:
-        global _running
-        _running = False
+PREFETCH = PrefetchEng.Prefetcher()
+STORY = StoryEng.Story(SCRIPT_CONTENT, (RES_WIDTH, RES_HEIGHT), PREFETCH, LAZY_LOADING, PREFETCH_DEPTH)
+STORY.load(f'DokiPy {VERSION} loaded {SCRIPT} Press dialogue box to start. DEMO')
+
+def on_stage_resize(render: pygame.Surface):
+    """
+    Window resized or the render resolution changed, the stage is already laid out again
+    """
+    global WINDOW, RENDER, SCR_WIDTH, SCR_HEIGHT, RES_WIDTH, RES_HEIGHT
+    WINDOW = PRESENTER.Window
+    RENDER = render
+    SCR_WIDTH, SCR_HEIGHT = WINDOW.get_size()
+    RES_WIDTH, RES_HEIGHT = RENDER.get_size()
+    STORY.ResSize = (RES_WIDTH, RES_HEIGHT)
+    # scenes and characters loaded from now on use the new size
+    DialogueHandler.initialize((RES_WIDTH, RES_HEIGHT), RENDER, AUDIO_ENG)
+PRESENTER.OnResize.append(on_stage_resize)
+
+UIEng.set_dirty_rects(DIRTY_RENDERING)
+Tween.use_vectorized(VECTOR_TWEENS)
+STEPPER = Tween.FixedStep(TICK_RATE, MAX_STEPS) if TICK_RATE else None
+Tween.set_interpolation(STEPPER is not None)
+
+PROFILER = ProfileEng.PROFILER
+PROFILER.Budget = 1/FPS
+def toggle_profiler(state: bool):
+    PROFILER.enable(state)
+    if state and PROFILER.draw_overlay not in PRESENTER.Overlays:
+        PRESENTER.Overlays.append(PROFILER.draw_overlay)
+    elif not state and PROFILER.draw_overlay in PRESENTER.Overlays:
+        PRESENTER.Overlays.remove(PROFILER.draw_overlay)
+        # the overlay was drawn over the frame
+        PRESENTER.invalidate()
+toggle_profiler(PROFILE_FRAMES)
+
+def export_profile():
+    if not PROFILER.Count:
         return
-    script: dict = SCRIPT_CONTENT['Story'][0]
-    SCRIPT_CONTENT['Story'].pop(0)
-    
-    bg_change = script.get('background_change')
-    char_add = script.get('char_add')
-    char_remove = script.get('char_remove')
-    char_talk = script.get('char_talk')
-    char_personality = script.get('char_personality')
-    talk_content = script.get('talk_content')
-    bgaudio_change = script.get('bgaudio_change')
-
-    if bg_change and bg_change != "":
-        DialogueHandler.switch_background(bg_change)
-
-    if char_add:
-        for char in char_add:
-            CHAR_ONSTAGE[char.get('name')] = DialogueHandler.add_actor_to_scene(char.get('name'), char.get('dialoguebox'), char.get('direction'))
-
-    if char_remove:
-        for char in char_remove:
-            CHAR_ONSTAGE[char].remove()
-
-    if char_talk:
-        # looking back loading the personality shouldnt be in the actor controller. oh well..
-        CHAR_ONSTAGE[char_talk].assign_personality(char_personality, PERSONALITIES[char_personality]) #type: ignore
-        CHAR_ONSTAGE[char_talk].say_line(talk_content, char_personality) #type: ignore
-
-    if bgaudio_change and bgaudio_change != "":
-        SoundEng.MAIN_MIX.load(bgaudio_change)
-        SoundEng.MAIN_MIX.play()
-
-DialogueHandler.get_dialogue_box('_intro')[0]._onclick(UIEng.UI_Event(move_script))
-
-# --- LOAD SCENES
-for scene in SCRIPT_CONTENT['Scenes']:
-    DialogueHandler.define_background(scene.get('src'), scene.get('name'))
-
-# --- LOAD DIALOGUE BOXES
-for box in SCRIPT_CONTENT['DialogueBoxes']:
-    DialogueHandler.define_dialogue_box(box.get('src'), box.get('name'), tuple(box.get('scale')))
-    DialogueHandler.get_dialogue_box(box.get('name'))[0]._onclick(UIEng.UI_Event(move_script))
-
-# --- LOAD PERSONALITIES
-PERSONALITIES: dict[str, DialogueHandler.Personality] = {}
-for psn in SCRIPT_CONTENT['Personalities']:
-    PERSONALITIES[psn.get('name')] = DialogueHandler.Personality(
-        ease_func=psn.get('diag_easing'),
-        ease_length=float(psn.get('diag_easelen')),
-        pos_offset=tuple(psn.get('diag_offset')),
-        c_ease_func=psn.get('char_easing'),
-        c_ease_length=float(psn.get('char_easelen')),
-        c_pos_offset=tuple(psn.get('char_offset')),
-        text_delay=None if psn.get('text_delay') < 0 else float(psn.get('text_delay')),
-        font=pygame.font.SysFont(psn.get('font'), int(psn.get('font_size'))),
-        talk_sound=psn.get('talk_sound'))
-    
-# --- LOAD CHARACTERS
-CHAR_ONSTAGE: dict[str, DialogueHandler.ActorController] = {}
-for char in SCRIPT_CONTENT['Characters']:
-    DialogueHandler.define_actors(char.get('src'), char.get('name'))
-    DialogueHandler.get_actor(char.get('name')).image_fit((int(RES_WIDTH), int(RES_HEIGHT)), 'y')
-    #CHAR_ONSTAGE[char.get('name')] = DialogueHandler.add_actor_to_scene(char.get('name'), 'basic', 'left', False) no.
-
-# --- FIRST SETUP
-first_setup = SCRIPT_CONTENT['Setup']
-DialogueHandler.switch_background(first_setup.get('background'))
-for char in first_setup.get('characters'):
-    controller = DialogueHandler.add_actor_to_scene(char.get('name'), char.get('dialoguebox'), 'left', False)
-    CHAR_ONSTAGE[char.get('name')] = controller
-
-SoundEng.MAIN_MIX.load(first_setup.get('bgaudio'))
-SoundEng.MAIN_MIX.play(loops=-1)
+    PROFILER.export_json(f'{PROFILE_EXPORT}.json')
+    PROFILER.export_csv(f'{PROFILE_EXPORT}.csv')
+    print(f'frame profile written to {PROFILE_EXPORT}.json/.csv')
+
+def is_idle() -> bool:
+    """
+    Nothing scheduled and the screen would look the same if drawn again
+    """
+    return not (Tween.tween_count() or Tween.LOOPS or SpriteEng.ANIMOBJ or UIEng.needs_redraw())
+
+if RECORD_PATH:
+    RECORDER = ReplayEng.Recorder(RECORD_PATH, {'script': SCRIPT, 'window': [SCR_WIDTH, SCR_HEIGHT]})
+
+def finish_replay():
+    """
+    Closes the recording with the state it ended in, or checks the replay against it
+    """
+    if RECORDER:
+        RECORDER.close(ReplayEng.state_digest())
+        print(f'recorded {RECORDER.Frames} frames to {RECORDER.Path}')
+    if REPLAYER and not REPLAYER.Finished:
+        frames = REPLAYER.Frames
+        same = REPLAYER.check(ReplayEng.state_digest())
+        print(f'replayed {frames} frames of {REPLAYER.Path}, state {"matches" if same else "differs from"} the recording')
 
 pygame.event.set_allowed(pygame.QUIT)
-while _running:
-    dt = TIMER.tick(FPS)/1000
-    events = pygame.event.get()
+while STORY.Running:
+    woke = []
+    if REPLAYER:
+        frame = REPLAYER.next_frame()
+        # a recording that ends without quitting quits here
+        dt, replay_pos, woke = frame if frame else (0.0, (0, 0), [pygame.event.Event(pygame.QUIT)])
+        TIMER.tick()
+    elif IDLE_MODE and is_idle():
+        event = pygame.event.wait(IDLE_TIMEOUT)
+        if event.type != pygame.NOEVENT:
+            woke.append(event)
+        # the wait is not frame time, start the clock over
+        TIMER.tick()
+        dt = 0.0
+    else:
+        dt = TIMER.tick(FPS)/1000
+    PROFILER.begin_frame()
+    PRESENTER.begin_frame()
+    PREFETCH.pump()
+    if REPLAYER:
+        # only closing the window gets through, everything else comes from the recording
+        events = woke + [v for v in pygame.event.get() if v.type == pygame.QUIT]
+        mouse_pos = replay_pos
+    else:
+        events = woke + pygame.event.get()
+        mouse_pos = pygame.mouse.get_pos()
+    if RECORDER:
+        RECORDER.record(dt, mouse_pos, events)
     for event in events:
         if event.type == pygame.QUIT:
             pygame.quit()
-            profiler.disable()
-            stats = pstats.Stats(profiler).sort_stats('tottime')
-            stats.print_stats(25)
+            if CPROFILE:
+                profiler.disable()
+                stats = pstats.Stats(profiler).sort_stats('tottime')
+                stats.print_stats(25)
+            export_profile()
+            finish_replay()
+            print(f'assets {AssetEng.ASSETS.stats()}')
+            print(f'prefetch {PREFETCH.stats()}')
+            for pack in AssetEng.ASSETS.Packs:
+                print(f'pack {pack.Path} hits {pack.Hits} stale {pack.Stale}')
+            PREFETCH.shutdown()
             sys.exit()
 
-    Tween.update_all(dt)
-    mouse_pos = pygame.mouse.get_pos()
-    UIEng.update_all(events, (int(mouse_pos[0]*RES_SCALE), int(mouse_pos[1]*RES_SCALE)))
-
-    render_scaled = pygame.transform.scale(RENDER, (SCR_WIDTH, SCR_HEIGHT))
-    WINDOW.blit(render_scaled, (0, 0))
-
-    pygame.display.flip()
-    pygame.display.set_caption(f"DokiPy {VERSION} [{SCRIPT}] FPS {TIMER.get_fps():.0f}")
\ No newline at end of file
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+            toggle_profiler(not PROFILER.Enabled)
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+            export_profile()
+
+    PRESENTER.handle_events(events)
+    PROFILER.mark('events')
+    if STEPPER:
+        for _ in range(STEPPER.advance(dt)):
+            Tween.update_all(STEPPER.Step)
+            SpriteEng.update_all(STEPPER.Step)
+        Tween.interpolate(STEPPER.Alpha)
+        PROFILER.mark('tween')
+    else:
+        Tween.update_all(dt)
+        PROFILER.mark('tween')
+        SpriteEng.update_all(dt)
+    PROFILER.mark('sprite')
+    updated = UIEng.update_all(events, PRESENTER.to_render(mouse_pos))
+    Tween.restore()
+
+    PRESENTER.present(updated)
+    PROFILER.end_frame()
+    pygame.display.set_caption(f"DokiPy {VERSION} [{SCRIPT}] FPS {TIMER.get_fps():.0f}")
+
+finish_replay()
@@ -7,6 +7,7 @@ pygame.init()
 import utils.sound_handler as SoundEng
 import utils.ui_handler as UIEng
 import utils.tween_handler as Tween
+import utils.display_handler as DisplayEng
 
 import src.dialogue as DialogueHandler
 import cProfile
@@ -27,6 +28,8 @@ SCR_SCALE = 0.5
 TIMER: pygame.time.Clock = None #type: ignore
 WINDOW: pygame.surface.Surface = None #type: ignore
 FPS = 120
+# let the player resize the window, the stage is laid out again for the new size
+RESIZABLE_WINDOW = False
 
 SCRIPT = sys.argv[1]
 
@@ -39,11 +42,11 @@ SCR_WIDTH = int(DisplayInfo.current_w*SCR_SCALE)
 RES_HEIGHT = int(SCR_HEIGHT*RES_SCALE)
 RES_WIDTH = int(SCR_WIDTH*RES_SCALE)
 
-WINDOW = pygame.display.set_mode((SCR_WIDTH, SCR_HEIGHT))
+PRESENTER = DisplayEng.Presenter((SCR_WIDTH, SCR_HEIGHT), RES_SCALE, pygame.RESIZABLE if RESIZABLE_WINDOW else 0)
+WINDOW = PRESENTER.Window
+RENDER = PRESENTER.Render
 TIMER = pygame.time.Clock()
 
-RENDER = pygame.Surface((RES_WIDTH, RES_HEIGHT))
-
 pygame.display.set_icon(pygame.image.load('assets/sprite/3a.png'))
 
 # todo to make this game good:
@@ -85,6 +88,7 @@ DialogueHandler.get_dialogue_box('Basic')[0]._onclick(UIEng.UI_Event(dialogueSki
 pygame.event.set_allowed(pygame.QUIT)
 while True:
     dt = TIMER.tick(FPS)/1000
+    PRESENTER.begin_frame()
     events = pygame.event.get()
     for event in events:
         if event.type == pygame.QUIT:
@@ -94,12 +98,9 @@ while True:
             stats.print_stats(25)
             sys.exit()
 
+    PRESENTER.handle_events(events)
     Tween.update_all(dt)
-    mouse_pos = pygame.mouse.get_pos()
-    UIEng.update_all(events, (int(mouse_pos[0]*RES_SCALE), int(mouse_pos[1]*RES_SCALE)))
-
-    render_scaled = pygame.transform.scale(RENDER, (SCR_WIDTH, SCR_HEIGHT))
-    WINDOW.blit(render_scaled, (0, 0))
+    UIEng.update_all(events, PRESENTER.to_render(pygame.mouse.get_pos()))
 
-    pygame.display.flip()
+    PRESENTER.present()
     pygame.display.set_caption(f"DokiPy v1.1 [{SCRIPT}] FPS {TIMER.get_fps():.0f}")
\ No newline at end of file
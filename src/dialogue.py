@@ -73,12 +73,19 @@ def switch_dialogue_box(alias: str):
         return None
 
 STORED_BACKGROUNDS: dict[str, UIEng.ImageUI] = {}
+DEFERRED_BACKGROUNDS: dict[str, str] = {}
 ACTIVE_BACKGROUND: typing.Union[UIEng.ImageUI, None] = None 
 
-def define_background(src: str, alias: str):
+def define_background(src: str, alias: str, lazy: bool = False):
     '''
     Define the background of the dialogue scene
+    lazy waits until the background is first used to load it
     '''
+    if lazy:
+        DEFERRED_BACKGROUNDS[alias] = src
+        return
+    DEFERRED_BACKGROUNDS.pop(alias, None)
+
     bg = UIEng.ImageUI(SURFACE.get_rect(), SURFACE, src)
     bg.image_fit(RES_SIZE)
     bg.set_anchor((0.5, 1))
@@ -89,13 +96,21 @@ def define_background(src: str, alias: str):
     global STORED_BACKGROUNDS
     STORED_BACKGROUNDS[alias] = bg
 
+def _load_background(alias: str) -> bool:
+    '''
+    Loads a lazy background, returns if the alias exists
+    '''
+    if alias in DEFERRED_BACKGROUNDS:
+        define_background(DEFERRED_BACKGROUNDS[alias], alias)
+    return alias in STORED_BACKGROUNDS
+
 def get_background(alias: str) -> typing.Union[UIEng.UI, None]:
     '''
     Returns UI object
     '''
     global ACTIVE_BACKGROUND, STORED_BACKGROUNDS
 
-    if not alias in STORED_BACKGROUNDS:
+    if not _load_background(alias):
         return None
     return STORED_BACKGROUNDS[alias]
 
@@ -105,7 +120,7 @@ def switch_background(alias: str):
     '''
     global ACTIVE_BACKGROUND, STORED_BACKGROUNDS
 
-    if not alias in STORED_BACKGROUNDS:
+    if not _load_background(alias):
         return False
     
     if ACTIVE_BACKGROUND:
@@ -116,6 +131,7 @@ def switch_background(alias: str):
     return True
 
 STORED_ACTORS: dict[str, SpriteEng.AnimatableSprite] = {}
+DEFERRED_ACTORS: dict[str, tuple[str, int, typing.Union[typing.Callable[[SpriteEng.AnimatableSprite], None], None]]] = {}
 ACTIVE_ACTORS: list[SpriteEng.AnimatableSprite] = []
 ACTIVE_CONTROLLERS: list[ActorController] = []
 
@@ -172,10 +188,7 @@ class ActorController:
             step = allocated_size / (actors-1)
             x_offset = base_x_offset + (step*index)
 
-        def updt(f: float):
-            self.Actor.ScaledPos = (f, self.Actor.ScaledPos[1])
-
-        Tween.Tween(delay, x_offset, self.Actor.ScaledPos[0], 'ease_out_quad', updt)
+        Tween.TweenProperty(delay, x_offset, self.Actor, 'ScaledPos', 0, 'ease_out_quad')
         return x_offset
 
     def assign_personality(self, alias: str, personality: Personality):
@@ -193,39 +206,32 @@ class ActorController:
         if ACTIVE_TEXT_TWEEN:
             ACTIVE_TEXT_TWEEN.kill()
 
-        def update_position(t: tuple[float, float]):
-            self.UIBG.PxPos = t
-        Tween.TweenTuple(use_personality.EaseTime, list(self.UIBG.PxPos), list(use_personality.PxOffset), use_personality.EaseFunction, update_position) #type: ignore
-
-        def update_char_position(t: tuple[float, float]):
-            self.Actor.PxPos = t
-        Tween.TweenTuple(use_personality.CharEaseTime, list(self.Actor.PxPos), list(use_personality.CharPxOffset), use_personality.CharEaseFunction, update_char_position) #type: ignore
+        # offsets are in pixels of the stage the script was written for
+        scale = UIEng.STAGE_SCALE
+        offset = tuple(v*scale for v in use_personality.PxOffset)
+        char_offset = tuple(v*scale for v in use_personality.CharPxOffset)
+        Tween.TweenProperty(use_personality.EaseTime, self.UIBG.PxPos, self.UIBG, 'PxPos', None, use_personality.EaseFunction, offset) #type: ignore
+        Tween.TweenProperty(use_personality.CharEaseTime, self.Actor.PxPos, self.Actor, 'PxPos', None, use_personality.CharEaseFunction, char_offset) #type: ignore
 
         delay = use_personality.TextDelay if use_personality.TextDelay is not None else len(text)*0.02
         
         if delay > 0:
-            text_list = list(text)
-            all_text = ""
+            # lay out and draw the whole line once, then reveal it
+            self.UIText.set_text(text, reveal=0)
 
             def update_text(lp_c: int):
-                nonlocal all_text
-
-                if len(text_list) <= 0:
-                    if ACTIVE_TEXT_TWEEN:
-                        ACTIVE_TEXT_TWEEN.kill()
-                    return
-
-                char = text_list[0]
-                text_list.pop(0)
-                all_text += char
-                self.UIText.set_text(all_text)
-            ACTIVE_TEXT_TWEEN = Tween.Loop(delay/len(text), update_text)
+                # a slow frame owes several characters, they come in one call
+                self.UIText.reveal_to(lp_c)
+                if lp_c >= len(text) and ACTIVE_TEXT_TWEEN:
+                    ACTIVE_TEXT_TWEEN.kill()
+            ACTIVE_TEXT_TWEEN = Tween.Loop(delay/len(text), update_text, coalesce=True)
+        else:
+            self.UIText.set_text(text)
 
     def remove(self):
+        # the whole position, so a sideways tween still running stops here
         copy = self.Actor.ScaledPos[0]
-        def updt(f: float):
-            self.Actor.ScaledPos = (copy, f)
-        Tween.Tween(1, 2, 1, 'ease_out_quad', updt)
+        Tween.TweenProperty(1, (copy, 2), self.Actor, 'ScaledPos', None, 'ease_out_quad', (copy, 1))
         index = ACTIVE_ACTORS.index(self.Actor)
         del ACTIVE_ACTORS[index]
 
@@ -236,10 +242,17 @@ class ActorController:
         for v in ACTIVE_CONTROLLERS:
             v.update_actor_position(1)
 
-def define_actors(src: str, alias: str, size_scale: int = 1):
+def define_actors(src: str, alias: str, size_scale: int = 1, lazy: bool = False,
+                  on_load: typing.Union[typing.Callable[[SpriteEng.AnimatableSprite], None], None] = None):
     '''
     Define actors
+    lazy waits until the actor is first used to load it, on_load is called with the sprite once loaded
     '''
+    if lazy:
+        DEFERRED_ACTORS[alias] = (src, size_scale, on_load)
+        return
+    DEFERRED_ACTORS.pop(alias, None)
+
     bg = SpriteEng.AnimatableSprite(SURFACE.get_rect(), SURFACE, src)
     bg.image_fit((RES_SIZE[0]*size_scale, RES_SIZE[1]*size_scale), 'y')
     bg.set_anchor((0.5, 1))
@@ -249,6 +262,17 @@ def define_actors(src: str, alias: str, size_scale: int = 1):
 
     global STORED_ACTORS
     STORED_ACTORS[alias] = bg
+    if on_load:
+        on_load(bg)
+
+def _load_actor(alias: str) -> bool:
+    '''
+    Loads a lazy actor, returns if the alias exists
+    '''
+    if alias in DEFERRED_ACTORS:
+        src, size_scale, on_load = DEFERRED_ACTORS[alias]
+        define_actors(src, alias, size_scale, on_load=on_load)
+    return alias in STORED_ACTORS
 
 def get_actor(alias: str) -> SpriteEng.AnimatableSprite:
     '''
@@ -256,7 +280,7 @@ def get_actor(alias: str) -> SpriteEng.AnimatableSprite:
     '''
     global STORED_ACTORS
 
-    if not alias in STORED_ACTORS:
+    if not _load_actor(alias):
         return None #type: ignore
     return STORED_ACTORS[alias]
 
@@ -268,7 +292,7 @@ def add_actor_to_scene(alias: str, dialogue_alias: str, direction: typing.Union[
     '''
     global ACTIVE_ACTORS, STORED_ACTORS
 
-    if not alias in STORED_ACTORS:
+    if not _load_actor(alias):
         return None #type: ignore (i know)
     actor = STORED_ACTORS[alias]
     actor.PxPos = (0, 20)
@@ -291,9 +315,7 @@ def add_actor_to_scene(alias: str, dialogue_alias: str, direction: typing.Union[
 
     actor.position((x_pos, 2))
     if tween:
-        def updt(f: float):
-            actor.ScaledPos = (actor.ScaledPos[0], f)
-        Tween.Tween(1, 1, 2, 'ease_out_quad', updt)
+        Tween.TweenProperty(1, 1, actor, 'ScaledPos', 1, 'ease_out_quad', 2)
     actor.set_visible(True)
 
     if not tween:
@@ -0,0 +1,143 @@
+from __future__ import annotations
+import pygame
+
+import utils.sound_handler as SoundEng
+import utils.ui_handler as UIEng
+import utils.tween_handler as Tween
+import utils.prefetch_handler as PrefetchEng
+
+import src.dialogue as DialogueHandler
+
+class Story:
+    """
+    Plays the story of a script, every click on a dialogue box runs the next step
+    """
+    def __init__(self, content: dict, res_size: tuple[int, int], prefetcher: PrefetchEng.Prefetcher,
+                 lazy: bool = True, prefetch_depth: int = 8) -> None:
+        self.Content = content
+        self.Steps: list[dict] = list(content['Story'])
+        self.ResSize = res_size
+        self.Prefetch = prefetcher
+        self.Lazy = lazy
+        self.PrefetchDepth = prefetch_depth
+        self.Running = True
+        self.StepsTaken = 0
+
+        self.SceneSources: dict[str, str] = {v.get('name'): v.get('src') for v in content['Scenes']}
+        self.CharacterSources: dict[str, str] = {v.get('name'): v.get('src') for v in content['Characters']}
+        self.Personalities: dict[str, DialogueHandler.Personality] = {}
+        self.OnStage: dict[str, DialogueHandler.ActorController] = {}
+
+    def load(self, intro_text: str):
+        """
+        Defines everything the script uses and sets up the first scene behind the intro box
+        """
+        content = self.Content
+        DialogueHandler.define_dialogue_box('assets/ui/textbox.png', '_intro', (0.8, 1))
+        DialogueHandler.switch_dialogue_box('_intro')
+        DialogueHandler.get_dialogue_box('_intro')[1].set_text(intro_text)
+        DialogueHandler.get_dialogue_box('_intro')[0]._onclick(UIEng.UI_Event(self.move_script))
+
+        # --- LOAD SCENES
+        for scene in content['Scenes']:
+            DialogueHandler.define_background(scene.get('src'), scene.get('name'), self.Lazy)
+
+        # --- LOAD DIALOGUE BOXES
+        for box in content['DialogueBoxes']:
+            DialogueHandler.define_dialogue_box(box.get('src'), box.get('name'), tuple(box.get('scale')))
+            DialogueHandler.get_dialogue_box(box.get('name'))[0]._onclick(UIEng.UI_Event(self.move_script))
+
+        # --- LOAD EASINGS, optional {name, bezier: [x1, y1, x2, y2]} or {name, keyframes: [[t, v, style?], ..]}
+        for ease in content.get('Easings', []):
+            if 'bezier' in ease:
+                Tween.define_bezier(ease.get('name'), *ease.get('bezier'))
+            elif 'keyframes' in ease:
+                Tween.define_keyframes(ease.get('name'), [tuple(v) for v in ease.get('keyframes')])
+
+        # --- LOAD PERSONALITIES
+        for psn in content['Personalities']:
+            self.Personalities[psn.get('name')] = DialogueHandler.Personality(
+                ease_func=psn.get('diag_easing'),
+                ease_length=float(psn.get('diag_easelen')),
+                pos_offset=tuple(psn.get('diag_offset')),
+                c_ease_func=psn.get('char_easing'),
+                c_ease_length=float(psn.get('char_easelen')),
+                c_pos_offset=tuple(psn.get('char_offset')),
+                text_delay=None if psn.get('text_delay') < 0 else float(psn.get('text_delay')),
+                font=pygame.font.SysFont(psn.get('font'), int(psn.get('font_size'))),
+                talk_sound=psn.get('talk_sound'))
+
+        # --- LOAD CHARACTERS
+        for char in content['Characters']:
+            DialogueHandler.define_actors(char.get('src'), char.get('name'), lazy=self.Lazy,
+                                          on_load=lambda actor: actor.image_fit((int(self.ResSize[0]), int(self.ResSize[1])), 'y'))
+
+        # --- FIRST SETUP
+        first_setup = content['Setup']
+        DialogueHandler.switch_background(first_setup.get('background'))
+        for char in first_setup.get('characters'):
+            controller = DialogueHandler.add_actor_to_scene(char.get('name'), char.get('dialoguebox'), 'left', False)
+            self.OnStage[char.get('name')] = controller
+
+        SoundEng.MAIN_MIX.load(first_setup.get('bgaudio'))
+        SoundEng.MAIN_MIX.play(loops=-1)
+        self.prefetch_story()
+
+    def move_script(self):
+        """
+        Runs the next step of the story, stops once there are none left
+        """
+        if len(self.Steps) == 0:
+            self.Running = False
+            return
+        script = self.Steps.pop(0)
+        self.StepsTaken += 1
+
+        self.prefetch_story()
+
+        bg_change = script.get('background_change')
+        char_add = script.get('char_add')
+        char_remove = script.get('char_remove')
+        char_talk = script.get('char_talk')
+        char_personality = script.get('char_personality')
+        talk_content = script.get('talk_content')
+        bgaudio_change = script.get('bgaudio_change')
+
+        if bg_change and bg_change != "":
+            if bg_change in self.SceneSources:
+                self.Prefetch.claim_image(self.SceneSources[bg_change])
+            DialogueHandler.switch_background(bg_change)
+
+        if char_add:
+            for char in char_add:
+                if char.get('name') in self.CharacterSources:
+                    self.Prefetch.claim_image(self.CharacterSources[char.get('name')])
+                self.OnStage[char.get('name')] = DialogueHandler.add_actor_to_scene(char.get('name'), char.get('dialoguebox'), char.get('direction'))
+
+        if char_remove:
+            for char in char_remove:
+                self.OnStage[char].remove()
+
+        if char_talk:
+            # looking back loading the personality shouldnt be in the actor controller. oh well..
+            self.OnStage[char_talk].assign_personality(char_personality, self.Personalities[char_personality]) #type: ignore
+            self.OnStage[char_talk].say_line(talk_content, char_personality) #type: ignore
+
+        if bgaudio_change and bgaudio_change != "":
+            SoundEng.MAIN_MIX.load(self.Prefetch.claim_audio(bgaudio_change), bgaudio_change.rsplit('.', 1)[-1])
+            SoundEng.MAIN_MIX.play()
+
+    def prefetch_story(self):
+        """
+        Starts loading what the next PrefetchDepth story steps will need
+        """
+        for script in self.Steps[:self.PrefetchDepth]:
+            bg_change = script.get('background_change')
+            if bg_change in self.SceneSources:
+                self.Prefetch.prefetch_image(self.SceneSources[bg_change], (self.ResSize[0], 1))
+            for char in script.get('char_add') or []:
+                if char.get('name') in self.CharacterSources and char.get('name') not in DialogueHandler.STORED_ACTORS:
+                    self.Prefetch.prefetch_image(self.CharacterSources[char.get('name')], (1, self.ResSize[1]))
+            bgaudio_change = script.get('bgaudio_change')
+            if bgaudio_change:
+                self.Prefetch.prefetch_audio(bgaudio_change)
@@ -0,0 +1,231 @@
+from __future__ import annotations
+import pygame
+import typing
+import os
+import time
+from collections import OrderedDict
+
+# bytes of decoded images to keep around, unreferenced ones are dropped past this
+MEMORY_BUDGET = 1024*1024*1024
+
+# scaled sizes cached per image
+SCALE_CACHE_SIZE = 8
+
+def surface_bytes(surface: pygame.Surface) -> int:
+    return surface.get_pitch()*surface.get_height()
+
+class MipChain:
+    """
+    Keeps the untouched source image and its halvings, any size is scaled down from
+    the nearest level instead of the full image. Scaled results are cached by size
+    """
+    def __init__(self, source: pygame.Surface, levels: typing.Union[list[pygame.Surface], None] = None) -> None:
+        self.Source = source
+        self.Levels = [source] + (levels or [])
+        self.Scaled: OrderedDict[tuple[int, int], pygame.Surface] = OrderedDict()
+        self.Bytes = sum(surface_bytes(v) for v in self.Levels)
+        # called with the change in Bytes whenever a level or size is added or dropped
+        self.OnBytes: typing.Union[typing.Callable[[int], None], None] = None
+
+    def _account(self, delta: int):
+        self.Bytes += delta
+        if self.OnBytes is not None:
+            self.OnBytes(delta)
+
+    def _scaled_bytes(self, surface: pygame.Surface) -> int:
+        # a size that is also a level is counted with the levels
+        return 0 if any(v is surface for v in self.Levels) else surface_bytes(surface)
+
+    def seed(self, scaled: dict[tuple[int, int], pygame.Surface]):
+        """
+        Adds already scaled sizes to the cache
+        """
+        for size, surface in scaled.items():
+            self._put(size, surface)
+
+    def _put(self, size: tuple[int, int], scaled: pygame.Surface):
+        old = self.Scaled.pop(size, None)
+        if old is not None:
+            self._account(-self._scaled_bytes(old))
+        self.Scaled[size] = scaled
+        delta = self._scaled_bytes(scaled)
+        if len(self.Scaled) > SCALE_CACHE_SIZE:
+            delta -= self._scaled_bytes(self.Scaled.popitem(last=False)[1])
+        self._account(delta)
+
+    def level_for(self, size: tuple[int, int]) -> pygame.Surface:
+        """
+        Smallest level still at least as big as size, halvings are made on demand
+        """
+        level = self.Levels[-1]
+        while level.get_width()//2 >= size[0] and level.get_height()//2 >= size[1] and level.get_width() > 1 and level.get_height() > 1:
+            level = pygame.transform.smoothscale(level, (level.get_width()//2, level.get_height()//2))
+            self.Levels.append(level)
+            self._account(surface_bytes(level))
+        for level in reversed(self.Levels):
+            if level.get_width() >= size[0] and level.get_height() >= size[1]:
+                return level
+        return self.Source
+
+    def get(self, size: tuple[int, int]) -> pygame.Surface:
+        """
+        Returns the source scaled to size, shared so do not draw on it
+        """
+        size = (max(int(size[0]), 1), max(int(size[1]), 1))
+        scaled = self.Scaled.get(size)
+        if scaled is not None:
+            self.Scaled.move_to_end(size)
+            return scaled
+
+        level = self.level_for(size)
+        scaled = level if level.get_size() == size else pygame.transform.smoothscale(level, size)
+        self._put(size, scaled)
+        return scaled
+
+    def get_bytes(self) -> int:
+        """
+        Memory held by the levels and cached sizes
+        """
+        return self.Bytes
+
+class ImageAsset:
+    """
+    A decoded image, shared by everything loading the same path
+    """
+    def __init__(self, path: str, surface: pygame.Surface, levels: typing.Union[list[pygame.Surface], None] = None) -> None:
+        self.Path = path
+        self.Refs = 0
+        self.Mips = MipChain(surface, levels)
+
+    @property
+    def Surface(self) -> pygame.Surface:
+        return self.Mips.Source
+
+    def get_bytes(self) -> int:
+        return self.Mips.get_bytes()
+
+class AssetManager:
+    """
+    Loads images once per path and reference counts them. Unreferenced images stay
+    cached until the memory budget is hit, then the least recently used go first
+    """
+    def __init__(self, budget: int = MEMORY_BUDGET) -> None:
+        self.Budget = budget
+        self.Images: dict[str, ImageAsset] = {}
+        self.Unused: OrderedDict[str, ImageAsset] = OrderedDict()
+        self.Resident = 0 # bytes held by Images, kept up to date by their mip chains
+        self.Hits = 0
+        self.Misses = 0
+        self.LoadTime = 0.0 # seconds spent loading on acquire
+        # baked packs checked before decoding, see pack_handler
+        self.Packs: list[typing.Any] = []
+
+    def mount(self, pack: typing.Any):
+        """
+        Loads images from a pack_handler.Pack when it has a fresh copy of them
+        """
+        self.Packs.append(pack)
+
+    def packed(self, path: str) -> bool:
+        """
+        If a mounted pack can load path without decoding it
+        """
+        return any(v.is_fresh(path) for v in self.Packs)
+
+    def _load(self, key: str, path: str) -> ImageAsset:
+        for pack in self.Packs:
+            loaded = pack.load(key)
+            if loaded is not None:
+                asset = ImageAsset(key, loaded[0])
+                asset.Mips.seed(loaded[1])
+                return asset
+        return ImageAsset(key, pygame.image.load(path).convert_alpha())
+
+    def acquire(self, path: str) -> ImageAsset:
+        """
+        Returns the image at path, loading it if needed. release it when done
+        """
+        key = os.path.normpath(path)
+        asset = self.Images.get(key)
+        if asset is None:
+            self.Misses += 1
+            start = time.perf_counter()
+            asset = self._load(key, path)
+            self.LoadTime += time.perf_counter() - start
+            self._add(key, asset)
+        else:
+            self.Hits += 1
+            self.Unused.pop(key, None)
+        asset.Refs += 1
+        self.evict()
+        return asset
+
+    def _add(self, key: str, asset: ImageAsset):
+        self.Images[key] = asset
+        self.Resident += asset.get_bytes()
+        asset.Mips.OnBytes = self._resized
+
+    def _resized(self, delta: int):
+        self.Resident += delta
+
+    def release(self, asset: ImageAsset):
+        """
+        Drops a reference from acquire, the image may be evicted once nothing uses it
+        """
+        asset.Refs -= 1
+        if asset.Refs <= 0:
+            asset.Refs = 0
+            if self.Images.get(asset.Path) is asset:
+                self.Unused[asset.Path] = asset
+            self.evict()
+
+    def put(self, path: str, surface: pygame.Surface, levels: typing.Union[list[pygame.Surface], None] = None) -> ImageAsset:
+        """
+        Adds an already decoded image (and its halvings) without referencing it
+        """
+        key = os.path.normpath(path)
+        asset = self.Images.get(key)
+        if asset is not None:
+            return asset
+        asset = ImageAsset(key, surface, levels)
+        self._add(key, asset)
+        self.Unused[key] = asset
+        self.evict()
+        return asset
+
+    def contains(self, path: str) -> bool:
+        return os.path.normpath(path) in self.Images
+
+    def set_budget(self, budget: int):
+        self.Budget = budget
+        self.evict()
+
+    def get_bytes(self) -> int:
+        """
+        Memory held by every resident image
+        """
+        return self.Resident
+
+    def evict(self):
+        """
+        Drops unreferenced images, oldest first, until under budget
+        """
+        while self.Resident > self.Budget and self.Unused:
+            key, asset = self.Unused.popitem(last=False)
+            del self.Images[key]
+            asset.Mips.OnBytes = None
+            self.Resident -= asset.get_bytes()
+
+    def stats(self) -> dict[str, typing.Any]:
+        total = self.Hits + self.Misses
+        return {
+            'images': len(self.Images),
+            'unused': len(self.Unused),
+            'hits': self.Hits,
+            'misses': self.Misses,
+            'hit_rate': self.Hits/total if total else 0.0,
+            'load_seconds': self.LoadTime,
+            'resident_bytes': self.get_bytes(),
+        }
+
+ASSETS = AssetManager()
@@ -0,0 +1,189 @@
+from __future__ import annotations
+import pygame
+import typing
+import time
+import math
+from collections import deque
+
+from . import ui_handler
+from . import profile_handler
+
+# dynamic resolution, render scale moves by RES_STEP when the average of a full
+# window of frames is over budget or under RES_HEADROOM of it
+RES_STEP = 0.1
+RES_HEADROOM = 0.6
+FRAME_WINDOW = 30
+
+class Presenter:
+    """
+    Owns the window and the render surface the game draws to. When both are the same
+    size the render surface is the window, otherwise it is scaled straight into the window
+    """
+    def __init__(self, window_size: tuple[int, int], res_scale: float = 1, flags: int = 0,
+                 budget: typing.Union[float, None] = None, min_scale: float = 0.5) -> None:
+        self.Flags = flags
+        self.Window = pygame.display.set_mode(window_size, flags)
+        self.ResScale = res_scale
+        self.MaxScale = res_scale
+        self.MinScale = min(min_scale, res_scale)
+        # seconds of work per frame to hold, None keeps the resolution fixed
+        self.Budget = budget
+        self.FrameTimes: deque[float] = deque(maxlen=FRAME_WINDOW)
+        self._FrameStart = 0.0
+        self._Full = True
+
+        # called with the new render surface after the resolution changed
+        self.OnResize: list[typing.Callable[[pygame.Surface], None]] = []
+        # drawn onto the window after the frame, return the area they drew
+        self.Overlays: list[typing.Callable[[pygame.Surface], typing.Union[pygame.Rect, None]]] = []
+        self.Render = self._make_render()
+
+    @property
+    def RenderSize(self) -> tuple[int, int]:
+        w, h = self.Window.get_size()
+        return (max(int(w*self.ResScale), 1), max(int(h*self.ResScale), 1))
+
+    @property
+    def Identity(self) -> bool:
+        return self.Render is self.Window
+
+    def _make_render(self) -> pygame.Surface:
+        size = self.RenderSize
+        if size == self.Window.get_size():
+            return self.Window
+        # same format as the window so scaling into it needs no conversion
+        return pygame.Surface(size, 0, self.Window)
+
+    def _set_render(self, old_size: tuple[int, int]):
+        """
+        Swaps in a render surface for the current window size and scale, lays out the stage again
+        """
+        old = self.Render
+        self.Render = self._make_render()
+        if self.Render is old and old.get_size() == old_size:
+            return
+        ui_handler.rescale_stage(old, self.Render, old_size)
+        self._Full = True
+        for callback in self.OnResize:
+            callback(self.Render)
+
+    def set_res_scale(self, scale: float):
+        """
+        Changes the internal resolution as a fraction of the window size
+        """
+        scale = min(max(scale, self.MinScale), self.MaxScale)
+        if scale == self.ResScale:
+            return
+        old_size = self.Render.get_size()
+        self.ResScale = scale
+        self._set_render(old_size)
+
+    def resize_window(self, size: tuple[int, int]):
+        """
+        Resizes the window, the render surface follows at the same scale
+        """
+        old_size = self.Render.get_size()
+        self.Window = pygame.display.set_mode(size, self.Flags)
+        self._set_render(old_size)
+
+    def invalidate(self):
+        """
+        Redraws and presents the whole window next frame
+        """
+        self._Full = True
+        ui_handler._add_damage(self.Render, self.Render.get_rect())
+
+    def handle_events(self, events: list[pygame.event.Event]):
+        for ev in events:
+            if ev.type == pygame.VIDEORESIZE and ev.size != self.Window.get_size():
+                self.resize_window(ev.size)
+
+    def to_render(self, pos: tuple[int, int]) -> tuple[int, int]:
+        """
+        Window coordinates to render coordinates
+        """
+        if self.Identity:
+            return pos
+        rw, rh = self.Render.get_size()
+        ww, wh = self.Window.get_size()
+        return (int(pos[0]*rw/ww), int(pos[1]*rh/wh))
+
+    def begin_frame(self):
+        """
+        Call after waiting for the frame, the time until present is checked against the budget
+        """
+        self._FrameStart = time.perf_counter()
+
+    def present(self, updated: typing.Union[list[pygame.Rect], None] = None):
+        """
+        Shows the render surface, updated are the changed regions from dirty rect mode
+        """
+        full = updated is None or self._Full
+        self._Full = False
+        rects: list[pygame.Rect] = [] # window coordinates
+
+        if full and not self.Identity:
+            try:
+                pygame.transform.scale(self.Render, self.Window.get_size(), self.Window)
+            except ValueError:
+                # window format can change under us, fall back to a copy
+                self.Window.blit(pygame.transform.scale(self.Render, self.Window.get_size()), (0, 0))
+        elif not full and self.Identity:
+            rects = list(updated) #type: ignore
+        elif not full:
+            rects = [self._scale_area(r) for r in updated] #type: ignore
+
+        for overlay in self.Overlays:
+            area = overlay(self.Window)
+            if area is None:
+                continue
+            rects.append(area)
+            if self.Identity:
+                # drawn over the render surface, have the UI draw what is underneath next frame
+                ui_handler._add_damage(self.Render, area)
+        profile_handler.PROFILER.mark('present')
+
+        if full:
+            pygame.display.flip()
+        elif rects:
+            pygame.display.update(rects)
+        profile_handler.PROFILER.mark('flip')
+        self._end_frame()
+
+    def _scale_area(self, area: pygame.Rect) -> pygame.Rect:
+        """
+        Scales one changed region of the render surface into the window, returns it in window coordinates
+        """
+        (rw, rh), (ww, wh) = self.Render.get_size(), self.Window.get_size()
+        # widen to whole steps where the scale ratio is exact, so the region samples the same
+        # source pixels as the full scale, short of its fixed point rounding, and leaves no seams
+        gx, gy = math.gcd(rw, ww), math.gcd(rh, wh)
+        sw, sh = rw//gx, rh//gy
+        left, top = area.x//sw, area.y//sh
+        right, bottom = -(-area.right//sw), -(-area.bottom//sh)
+        src = pygame.Rect(left*sw, top*sh, (right - left)*sw, (bottom - top)*sh).clip(self.Render.get_rect())
+        dest = pygame.Rect(left*(ww//gx), top*(wh//gy), (right - left)*(ww//gx), (bottom - top)*(wh//gy)).clip(self.Window.get_rect())
+        if not src or not dest:
+            return dest
+        try:
+            pygame.transform.scale(self.Render.subsurface(src), dest.size, self.Window.subsurface(dest))
+        except ValueError:
+            self.Window.blit(pygame.transform.scale(self.Render.subsurface(src), dest.size), dest)
+        return dest
+
+    def _end_frame(self):
+        if self.Budget is None or not self._FrameStart:
+            return
+        self.FrameTimes.append(time.perf_counter() - self._FrameStart)
+        if len(self.FrameTimes) < FRAME_WINDOW:
+            return
+        average = sum(self.FrameTimes)/len(self.FrameTimes)
+        if average > self.Budget and self.ResScale > self.MinScale:
+            scale = self.ResScale - RES_STEP
+        elif average < self.Budget*RES_HEADROOM and self.ResScale < self.MaxScale:
+            scale = self.ResScale + RES_STEP
+        else:
+            return
+        # a full window of frames at the new scale before judging again
+        self.FrameTimes.clear()
+        self.set_res_scale(round(scale, 2))
@@ -0,0 +1,360 @@
+from __future__ import annotations
+import pygame
+import typing
+import bisect
+from collections import OrderedDict
+
+# cache limits, least recently used entries are dropped first
+GLYPH_CACHE_SIZE = 512
+WORD_CACHE_SIZE = 4096
+ATLAS_CACHE_SIZE = 32
+OUTLINE_CACHE_SIZE = 256
+
+METRICS: dict[pygame.font.Font, FontMetrics] = {}
+ATLASES: OrderedDict[tuple[pygame.font.Font, tuple], GlyphAtlas] = OrderedDict()
+OUTLINES: OrderedDict[tuple[pygame.font.Font, str, int, tuple], pygame.Surface] = OrderedDict()
+
+def get_metrics(font: pygame.font.Font) -> FontMetrics:
+    """
+    Returns the shared metrics cache of a font
+    """
+    if font not in METRICS:
+        METRICS[font] = FontMetrics(font)
+    return METRICS[font]
+
+def get_atlas(font: pygame.font.Font, color: typing.Sequence[int]) -> GlyphAtlas:
+    """
+    Returns the shared glyph atlas of a font and color
+    """
+    key = (font, tuple(color))
+    if key in ATLASES:
+        ATLASES.move_to_end(key)
+        return ATLASES[key]
+    atlas = GlyphAtlas(font, key[1])
+    ATLASES[key] = atlas
+    if len(ATLASES) > ATLAS_CACHE_SIZE:
+        ATLASES.popitem(last=False)
+    return atlas
+
+def forget_font(font: pygame.font.Font):
+    """
+    Drops everything cached for font, call after changing its size or style
+    """
+    METRICS.pop(font, None)
+    for key in [k for k in ATLASES if k[0] is font]:
+        del ATLASES[key]
+    for key in [k for k in OUTLINES if k[0] is font]:
+        del OUTLINES[key]
+
+class FontMetrics:
+    """
+    Caches measurements of a font. Words and character pairs are measured with Font.size and
+    positions are summed from them, kerning inside words included. Font.render rounds kerning once
+    per line, so long lines can come out a few px apart from it
+    """
+    def __init__(self, font: pygame.font.Font) -> None:
+        self.Font = font
+        # Font.render can be taller than get_height, match it
+        self.Height = font.render(' ', True, (0, 0, 0)).get_height()
+        self.LineSize = font.get_linesize()
+        self.Widths: OrderedDict[str, int] = OrderedDict()
+        self.Offsets: OrderedDict[str, tuple[int, ...]] = OrderedDict()
+
+    def width(self, text: str) -> int:
+        """
+        Width of text as drawn by GlyphAtlas. Words are cached, lines are summed from them
+        """
+        width = self.Widths.get(text)
+        if width is not None:
+            self.Widths.move_to_end(text)
+            return width
+        if len(text) > 2 and ' ' in text:
+            return self._measure(text)[1]
+        width = self.Widths[text] = self.Font.size(text)[0]
+        if len(self.Widths) > WORD_CACHE_SIZE:
+            self.Widths.popitem(last=False)
+        return width
+
+    def advance(self, prev: str, ch: str) -> int:
+        """
+        How much ch widens a string ending in prev, kerning between the two included
+        """
+        if not prev:
+            return self.width(ch)
+        return self.width(prev + ch) - self.width(prev)
+
+    def word_offsets(self, word: str) -> tuple[int, ...]:
+        """
+        X position of every character of a word drawn at 0
+        """
+        offsets = self.Offsets.get(word)
+        if offsets is None:
+            right = 0
+            prev = ''
+            result = []
+            for ch in word:
+                right += self.advance(prev, ch)
+                result.append(right - self.width(ch))
+                prev = ch
+            offsets = self.Offsets[word] = tuple(result)
+            if len(self.Offsets) > WORD_CACHE_SIZE:
+                self.Offsets.popitem(last=False)
+        else:
+            self.Offsets.move_to_end(word)
+        return offsets
+
+    def _measure(self, text: str) -> tuple[list[tuple[int, int, str]], int]:
+        """
+        Word positions of text and its width, one cached lookup per word
+        """
+        width = self.width
+        space = width(' ')
+        result = []
+        x = 0
+        end = 0
+        for word in text.split(' '):
+            if word:
+                result.append((x, end, word))
+                x += width(word)
+            x += space
+            end += len(word) + 1
+        return result, x - space
+
+    def offsets(self, text: str) -> list[tuple[int, int, str]]:
+        """
+        X position and character index of every word in text (split by spaces)
+        """
+        return self._measure(text)[0]
+
+class GlyphAtlas:
+    """
+    Rasterizes every glyph of a font in a color once and composes lines out of them
+    """
+    def __init__(self, font: pygame.font.Font, color: tuple) -> None:
+        self.Font = font
+        self.Color = color
+        self.Metrics = get_metrics(font)
+        self.Glyphs: OrderedDict[str, pygame.Surface] = OrderedDict()
+
+    def glyph(self, ch: str) -> pygame.Surface:
+        """
+        Returns the cached surface of a character
+        """
+        surf = self.Glyphs.get(ch)
+        if surf is None:
+            surf = self.Font.render(ch, True, self.Color)
+            self.Glyphs[ch] = surf
+            if len(self.Glyphs) > GLYPH_CACHE_SIZE:
+                self.Glyphs.popitem(last=False)
+        else:
+            self.Glyphs.move_to_end(ch)
+        return surf
+
+    def render_to(self, surface: pygame.Surface, text: str, pos: tuple[int, int], background: typing.Union[typing.Sequence[int], None] = None):
+        """
+        Draws text onto surface at pos, like blitting Font.render(text)
+        """
+        if not text:
+            return
+        x, y = pos
+        if background is not None:
+            surface.fill(background, pygame.Rect(x, y, self.Metrics.width(text), self.Metrics.Height))
+        glyph = self.glyph
+        batch = []
+        for word_x, _, word in self.Metrics.offsets(text):
+            for ch, ch_x in zip(word, self.Metrics.word_offsets(word)):
+                batch.append((glyph(ch), (x+word_x+ch_x, y)))
+        surface.blits(batch, False)
+
+    def render(self, text: str, background: typing.Union[typing.Sequence[int], None] = None) -> pygame.Surface:
+        """
+        Returns a new surface with the text drawn, like Font.render
+        """
+        surf = pygame.Surface((self.Metrics.width(text), self.Metrics.Height), pygame.SRCALPHA)
+        self.render_to(surf, text, (0, 0), background)
+        return surf
+
+def grow_mask(mask: pygame.mask.Mask, thickness: int, spacing: int = 1) -> pygame.mask.Mask:
+    """
+    Returns mask stamped at every offset -thickness..thickness times spacing on both axes,
+    thickness*spacing px bigger on every side. Each axis takes log2(thickness) passes
+    """
+    w, h = mask.get_size()
+    reach = thickness*spacing
+    grown = pygame.mask.Mask((w + reach*2, h + reach*2))
+    grown.draw(mask, (0, 0))
+
+    total = thickness*2 + 1
+    for axis in ((1, 0), (0, 1)):
+        # after each pass the mask covers shifts 0..span-1 (times spacing) along the axis
+        span = 1
+        while span < total:
+            step = min(span, total - span)
+            grown.draw(grown.copy(), (axis[0]*step*spacing, axis[1]*step*spacing))
+            span += step
+    return grown
+
+def outline_reach(thickness: int) -> int:
+    """
+    How far an outline of thickness goes past the text. The text is stamped every thickness px
+    out to thickness of them, like TextUI borders always have been
+    """
+    return thickness*thickness
+
+def render_outline(font: pygame.font.Font, text: str, thickness: int, color: typing.Sequence[int]) -> pygame.Surface:
+    """
+    Returns the outline of text, drawing text at (outline_reach, outline_reach) on top of it lines up.
+    Cached per line, rendered once no matter the thickness
+    """
+    key = (font, text, thickness, tuple(color))
+    surf = OUTLINES.get(key)
+    if surf is not None:
+        OUTLINES.move_to_end(key)
+        return surf
+
+    text_surf = get_atlas(font, (255, 255, 255)).render(text)
+    mask = grow_mask(pygame.mask.from_surface(text_surf), thickness, thickness)
+    surf = mask.to_surface(setcolor=pygame.Color(*color), unsetcolor=(0, 0, 0, 0))
+
+    OUTLINES[key] = surf
+    if len(OUTLINES) > OUTLINE_CACHE_SIZE:
+        OUTLINES.popitem(last=False)
+    return surf
+
+class LineBox:
+    """
+    A laid out line, Text is Source[Start:End] with trailing spaces dropped
+    """
+    def __init__(self, text: str, start: int, end: int, width: int, y: int) -> None:
+        self.Text = text
+        self.Start = start
+        self.End = end
+        self.Width = width
+        self.X = 0
+        self.Y = y
+        # right edge of the drawn text after each character, see TextLayout.char_edges
+        self.Edges: typing.Union[list[int], None] = None
+
+class TextLayout:
+    """
+    Text wrapped into line boxes for a font and wrap width, reusable until either changes
+    """
+    def __init__(self, font: pygame.font.Font, text: str, wrap_width: int) -> None:
+        self.Font = font
+        self.Text = text
+        self.WrapWidth = wrap_width
+        self.Metrics = get_metrics(font)
+        self.Lines: list[LineBox] = []
+        self.Alignment = 'left'
+        self._layout()
+
+    def matches(self, font: pygame.font.Font, text: str, wrap_width: int) -> bool:
+        return self.Font is font and self.Text == text and self.WrapWidth == wrap_width
+
+    def _add_line(self, start: int, end: int):
+        line = self.Text[start:end].rstrip(' ')
+        self.Lines.append(LineBox(line, start, end, self.Metrics.width(line), len(self.Lines)*self.Metrics.LineSize))
+
+    def _fit(self, word: str) -> int:
+        """
+        How many characters of word fit in the wrap width, at least 1
+        """
+        size = self.Font.size
+        fits = bisect.bisect_left(range(1, len(word)+1), self.WrapWidth, key=lambda i: size(word[:i])[0])
+        return max(1, fits)
+
+    def _layout(self):
+        """
+        Greedy word wrap, every word is measured once
+        """
+        metrics = self.Metrics
+        space = metrics.width(' ')
+        pos = 0
+        for paragraph in self.Text.split('\n'):
+            start = None
+            end = pos
+            width = 0
+            for word in paragraph.split(' '):
+                word_width = metrics.width(word)
+                if start is not None and width + word_width >= self.WrapWidth:
+                    self._add_line(start, end)
+                    start = None
+                if start is None:
+                    # hard break anything wider than a whole line
+                    while len(word) > 1 and word_width >= self.WrapWidth:
+                        cut = self._fit(word)
+                        self._add_line(pos, pos+cut)
+                        pos += cut
+                        word = word[cut:]
+                        word_width = metrics.width(word)
+                    start = pos
+                    width = 0
+                width += word_width + space
+                pos += len(word)
+                end = pos
+                pos += 1 # the space, or the newline after the paragraph
+            self._add_line(start, end) #type: ignore
+
+    @property
+    def Height(self) -> int:
+        return self.Metrics.LineSize * len(self.Lines)
+
+    def align(self, alignment: typing.Literal['left', 'right', 'center']):
+        """
+        Sets the x offset of every line inside the wrap width
+        """
+        self.Alignment = alignment
+        for line in self.Lines:
+            if alignment == 'center':
+                line.X = (self.WrapWidth-line.Width)//2
+            elif alignment == 'right':
+                line.X = self.WrapWidth-line.Width
+            else:
+                line.X = 0
+
+    def char_edges(self, line: LineBox) -> list[int]:
+        """
+        Right edge of the line drawn so far after each character
+        """
+        if line.Edges is not None:
+            return line.Edges
+        metrics = self.Metrics
+        edges = [0]*len(line.Text)
+        for word_x, col, word in metrics.offsets(line.Text):
+            for i, ch_x in enumerate(metrics.word_offsets(word)):
+                edges[col+i] = word_x + ch_x + metrics.width(word[i])
+        # spaces and overlapping glyphs never move the edge back
+        right = 0
+        for i, edge in enumerate(edges):
+            right = max(right, edge)
+            edges[i] = right
+        line.Edges = edges
+        return edges
+
+    def reveal_rects(self, start: int, end: int, border: int = 0) -> list[tuple[int, pygame.Rect]]:
+        """
+        Line index and area of the rendered text that show characters start..end of the
+        source text, border is the outline thickness the text was drawn with. Areas take in
+        as much of the outline as reaches out of the characters, clip them to the surface
+        """
+        rects = []
+        reach = outline_reach(border)
+        height = self.Metrics.Height + reach*2
+        for li, line in enumerate(self.Lines):
+            if line.End <= start:
+                continue
+            if line.Start >= end:
+                break
+            c0 = max(start - line.Start, 0)
+            c1 = min(end - line.Start, len(line.Text))
+            if c1 <= c0:
+                continue
+            edges = self.char_edges(line)
+            left = line.X + border
+            # mid line the area stops border px past the last character so little of the
+            # next one's outline shows, the line's end takes all of it
+            x0 = left + edges[c0-1] + border if c0 > 0 else left - reach
+            x1 = left + edges[c1-1] + (reach if c1 == len(line.Text) else border)
+            if x1 > x0:
+                rects.append((li, pygame.Rect(x0, line.Y + border - reach, x1-x0, height)))
+        return rects
@@ -0,0 +1,207 @@
+from __future__ import annotations
+import pygame
+import typing
+import json
+import mmap
+import os
+import sys
+import struct
+
+from . import asset_handler
+
+# file layout: header, json index, then raw pixels in the byte order of the surface they were baked from.
+# index offsets count from the pixel data. the header also has the byte order convert_alpha gave on
+# the display the pack was baked with, and the byte order of the machine
+PACK_MAGIC = b'DOKIPACK'
+PACK_VERSION = 3
+_HEADER = struct.Struct('<8sII4s1s3x') # magic, version, index length, display format, '<' or '>'
+_BYTE_ORDERS = {'little': b'<', 'big': b'>'}
+_ALIGN = 16
+
+def _data_start(index_len: int) -> int:
+    start = _HEADER.size + index_len
+    return start + (-start % _ALIGN)
+
+def _pixel_format(surface: pygame.Surface) -> str:
+    """
+    frombuffer format with the byte order of surface, surfaces built from it blit like the original
+    """
+    if surface.get_bitsize() != 32:
+        return 'RGBA'
+    fmt = ''.join(ch for _, ch in sorted(zip(surface.get_shifts(), 'RGBA')))
+    if sys.byteorder == 'big':
+        fmt = fmt[::-1]
+    return fmt if fmt in ('RGBA', 'BGRA', 'ARGB') else 'RGBA'
+
+def _display_format() -> str:
+    """
+    _pixel_format of what convert_alpha gives on the current display, empty without one
+    """
+    if pygame.display.get_surface() is None:
+        return ''
+    return _pixel_format(pygame.Surface((1, 1), pygame.SRCALPHA).convert_alpha())
+
+def _source_stamp(path: str) -> typing.Union[tuple[int, int], None]:
+    """
+    Modification time and size of a source file, None if it is gone
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+class Pack:
+    """
+    A memory mapped pack of decoded images. Surfaces are built straight from the mapping in
+    the format they were baked in, entries whose source file changed since the bake are treated as missing.
+    Baked for another display format or byte order they are converted once on load instead
+    """
+    def __init__(self, path: str) -> None:
+        self.Path = path
+        self._file = open(path, 'rb')
+        # copy on write, pygame wants a writable buffer and nothing is ever written back
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_COPY)
+        self._view = memoryview(self._map)
+
+        magic, version, index_len, display_format, byte_order = _HEADER.unpack_from(self._map, 0)
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            self.close()
+            raise ValueError(f'{path} is not a version {PACK_VERSION} pack')
+        if byte_order not in _BYTE_ORDERS.values():
+            self.close()
+            raise ValueError(f'{path} has an unknown byte order {byte_order!r}')
+        self.Format = display_format.rstrip(b'\0').decode('ascii')
+        self.ByteOrder = 'little' if byte_order == b'<' else 'big'
+        # the pixels read right anywhere, but surfaces in another format than the display's
+        # would be converted on every blit
+        current = _display_format()
+        self.Native = self.ByteOrder == sys.byteorder and (not current or self.Format == current)
+        index = json.loads(bytes(self._view[_HEADER.size:_HEADER.size+index_len]).decode('utf-8'))
+        self.Resolution: tuple[int, int] = tuple(index['resolution']) #type: ignore
+        self.Entries: dict[str, dict] = index['entries']
+        self._data = _data_start(index_len)
+        self.Hits = 0
+        self.Stale = 0
+
+    def _surface(self, image: dict) -> pygame.Surface:
+        start = self._data + image['offset']
+        data = self._view[start:start+image['length']]
+        surface = pygame.image.frombuffer(data, (image['width'], image['height']), image['format'])
+        if not self.Native:
+            # a copy in the display's format, no longer backed by the mapping
+            surface = surface.convert_alpha()
+        return surface
+
+    def is_fresh(self, path: str) -> bool:
+        """
+        If path is in the pack and its source has not changed since the bake
+        """
+        entry = self.Entries.get(os.path.normpath(path))
+        return entry is not None and _source_stamp(path) == (entry['mtime'], entry['size'])
+
+    def load(self, path: str) -> typing.Union[tuple[pygame.Surface, dict[tuple[int, int], pygame.Surface]], None]:
+        """
+        Returns the source image and its baked sizes, None if missing or stale.
+        All of them stay backed by the mapping, nothing is copied unless the pack is not Native
+        """
+        key = os.path.normpath(path)
+        if key not in self.Entries:
+            return None
+        if not self.is_fresh(key):
+            self.Stale += 1
+            return None
+        self.Hits += 1
+        entry = self.Entries[key]
+        source = self._surface(entry['source'])
+        scaled = {}
+        for image in entry['scaled']:
+            scaled[(image['width'], image['height'])] = self._surface(image)
+        return (source, scaled)
+
+    def close(self):
+        self._view.release()
+        self._map.close()
+        self._file.close()
+
+def write_pack(path: str, resolution: tuple[int, int], assets: typing.Iterable[asset_handler.ImageAsset]):
+    """
+    Writes the source pixels and every cached size of assets to a pack file, stamped with
+    the current display's format and the machine's byte order
+    """
+    entries = {}
+    blobs: list[bytes] = []
+    offset = 0
+
+    def add(surface: pygame.Surface) -> dict:
+        nonlocal offset
+        fmt = _pixel_format(surface)
+        data = pygame.image.tobytes(surface, fmt)
+        image = {'width': surface.get_width(), 'height': surface.get_height(), 'format': fmt, 'offset': offset, 'length': len(data)}
+        pad = -len(data) % _ALIGN
+        blobs.append(data + bytes(pad))
+        offset += len(data) + pad
+        return image
+
+    for asset in assets:
+        stamp = _source_stamp(asset.Path)
+        if stamp is None:
+            continue
+        source_size = asset.Mips.Source.get_size()
+        entries[asset.Path] = {
+            'mtime': stamp[0],
+            'size': stamp[1],
+            'source': add(asset.Mips.Source),
+            'scaled': [add(v) for k, v in asset.Mips.Scaled.items() if k != source_size],
+        }
+
+    index = json.dumps({'resolution': list(resolution), 'entries': entries}).encode('utf-8')
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(PACK_MAGIC, PACK_VERSION, len(index), _display_format().encode('ascii'), _BYTE_ORDERS[sys.byteorder]))
+        f.write(index)
+        f.write(bytes(_data_start(len(index)) - _HEADER.size - len(index)))
+        for blob in blobs:
+            f.write(blob)
+
+def bake(script: str, resolution: tuple[int, int], out: typing.Union[str, None] = None) -> str:
+    """
+    Loads every image of a script the way the game does at resolution and packs the result
+    """
+    import src.dialogue as DialogueHandler
+
+    if not pygame.display.get_init() or pygame.display.get_surface() is None:
+        pygame.display.init()
+        # convert_alpha needs a display mode, the bake never draws to it
+        pygame.display.set_mode((1, 1), pygame.HIDDEN)
+    pygame.font.init()
+
+    with open(f'./scripts/{script}.json', 'r') as f:
+        content = json.load(f)
+
+    render = pygame.Surface(resolution)
+    DialogueHandler.initialize(resolution, render, None) #type: ignore
+    # the intro box main.py shows before the story starts
+    DialogueHandler.define_dialogue_box('assets/ui/textbox.png', '_intro', (0.8, 1))
+    for scene in content['Scenes']:
+        DialogueHandler.define_background(scene.get('src'), scene.get('name'))
+    for box in content['DialogueBoxes']:
+        DialogueHandler.define_dialogue_box(box.get('src'), box.get('name'), tuple(box.get('scale')))
+    for char in content['Characters']:
+        DialogueHandler.define_actors(char.get('src'), char.get('name'))
+
+    out = out or f'./scripts/{script}.pack'
+    write_pack(out, resolution, asset_handler.ASSETS.Images.values())
+    return out
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Bakes the images of a script into a pack file')
+    parser.add_argument('script', help='script name in ./scripts, without .json')
+    parser.add_argument('--size', required=True, help='render resolution the game runs at, WIDTHxHEIGHT')
+    parser.add_argument('--out', default=None, help='pack path, defaults to ./scripts/<script>.pack')
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.lower().split('x'))
+    path = bake(args.script, (width, height), args.out)
+    print(f'baked {len(asset_handler.ASSETS.Images)} images into {path} ({os.path.getsize(path)} bytes)')
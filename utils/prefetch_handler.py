@@ -0,0 +1,138 @@
+from __future__ import annotations
+import pygame
+import typing
+import io
+import os
+import concurrent.futures
+
+from . import asset_handler
+
+# posted from the worker when a job finishes, wakes a main loop sleeping in pygame.event.wait
+PREFETCH_DONE = pygame.event.custom_type()
+
+def _post_done(future: concurrent.futures.Future):
+    try:
+        pygame.event.post(pygame.event.Event(PREFETCH_DONE))
+    except pygame.error:
+        # no display, nobody is waiting on events
+        pass
+
+def _decode_image(path: str, min_size: tuple[int, int]) -> list[pygame.Surface]:
+    """
+    Worker side, decodes the image and halves it while it stays above min_size
+    """
+    levels = [pygame.image.load(path)]
+    try:
+        while True:
+            w, h = levels[-1].get_width()//2, levels[-1].get_height()//2
+            if w < max(min_size[0], 1) or h < max(min_size[1], 1):
+                break
+            levels.append(pygame.transform.smoothscale(levels[-1], (w, h)))
+    except (ValueError, pygame.error):
+        # smoothscale only takes 24/32 bit images, the main thread handles the rest
+        pass
+    return levels
+
+def _read_file(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+class Prefetcher:
+    """
+    Decodes images and reads audio on a thread pool ahead of time. Finished images are
+    converted on the main thread in pump and handed to the asset manager
+    """
+    def __init__(self, assets: asset_handler.AssetManager = asset_handler.ASSETS, workers: int = 2) -> None:
+        self.Assets = assets
+        self.Pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix='prefetch')
+        self.Images: dict[str, concurrent.futures.Future] = {}
+        self.Audio: dict[str, concurrent.futures.Future] = {}
+
+        self.Hits = 0
+        self.Late = 0 # requested but not done in time, waited on
+        self.Misses = 0
+
+    def prefetch_image(self, path: str, min_size: tuple[int, int] = (0, 0)):
+        """
+        Starts decoding path unless it is loaded, baked or on the way
+        """
+        key = os.path.normpath(path)
+        if key in self.Images or self.Assets.contains(key) or self.Assets.packed(key):
+            return
+        self.Images[key] = self.Pool.submit(_decode_image, path, min_size)
+        self.Images[key].add_done_callback(_post_done)
+
+    def prefetch_audio(self, path: str):
+        """
+        Starts reading an audio file into memory
+        """
+        key = os.path.normpath(path)
+        if key in self.Audio:
+            return
+        self.Audio[key] = self.Pool.submit(_read_file, path)
+
+    def _finish_image(self, key: str, future: concurrent.futures.Future):
+        del self.Images[key]
+        try:
+            levels = [v.convert_alpha() for v in future.result()]
+        except Exception as e:
+            print(f'exception at prefetch {e}')
+            return
+        self.Assets.put(key, levels[0], levels[1:])
+
+    def pump(self):
+        """
+        Hands finished images to the asset manager, call once a frame on the main thread
+        """
+        for key, future in list(self.Images.items()):
+            if future.done():
+                self._finish_image(key, future)
+
+    def claim_image(self, path: str):
+        """
+        Call right before path gets used, waits for it if it is still decoding
+        """
+        key = os.path.normpath(path)
+        future = self.Images.get(key)
+        if future is not None:
+            if future.done():
+                self.Hits += 1
+            else:
+                self.Late += 1
+            self._finish_image(key, future)
+        elif self.Assets.contains(key):
+            self.Hits += 1
+        else:
+            self.Misses += 1
+
+    def claim_audio(self, path: str) -> typing.Union[io.BytesIO, str]:
+        """
+        Returns the prefetched file for pygame.mixer.music.load, or path if it was not
+        """
+        key = os.path.normpath(path)
+        future = self.Audio.pop(key, None)
+        if future is None:
+            self.Misses += 1
+            return path
+        if future.done():
+            self.Hits += 1
+        else:
+            self.Late += 1
+        try:
+            return io.BytesIO(future.result())
+        except Exception as e:
+            print(f'exception at prefetch {e}')
+            return path
+
+    def stats(self) -> dict[str, typing.Any]:
+        total = self.Hits + self.Late + self.Misses
+        return {
+            'hits': self.Hits,
+            'late': self.Late,
+            'misses': self.Misses,
+            'hit_rate': self.Hits/total if total else 0.0,
+            'pending': len(self.Images) + len(self.Audio),
+        }
+
+    def shutdown(self):
+        self.Pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,176 @@
+from __future__ import annotations
+import pygame
+import typing
+import time
+import json
+import csv
+from array import array
+
+# phases in the order the main loop runs them
+PHASES = ('events', 'tween', 'sprite', 'ui_blit', 'ui_state', 'present', 'flip')
+PHASE_COLORS = {
+    'events': (120, 120, 120),
+    'tween': (80, 160, 255),
+    'sprite': (80, 220, 200),
+    'ui_blit': (255, 200, 60),
+    'ui_state': (255, 130, 40),
+    'present': (200, 90, 255),
+    'flip': (255, 80, 120),
+}
+
+class FrameProfiler:
+    """
+    Times the phases of every frame into a fixed size ring buffer. Each mark adds the time
+    since the previous mark to a phase, everything returns right away while disabled
+    """
+    def __init__(self, frames: int = 600, phases: tuple[str, ...] = PHASES) -> None:
+        self.Enabled = False
+        self.Phases = phases
+        self.Size = frames
+        self.Count = 0 # frames recorded since the start, the buffer keeps the last Size
+        # a row per frame: the time of each phase then the whole frame, in seconds
+        self._Width = len(phases)+1
+        self.Samples = array('d', bytes(8*frames*self._Width))
+        self._Slots = {v: i for i, v in enumerate(phases)}
+        self._Row = [0.0]*len(phases)
+        self._Start = 0.0
+        self._Last = 0.0
+
+        # overlay
+        self.Budget = 1/60
+        self.OverlayPos = (8, 8)
+        self.OverlaySize = (240, 96)
+        self._Graph: typing.Union[pygame.Surface, None] = None
+        self._Labels: typing.Union[pygame.Surface, None] = None
+        self._LabelsAt = 0
+        self._Font: typing.Union[pygame.font.Font, None] = None
+
+    def enable(self, state: bool = True):
+        self.Enabled = state
+        self._Start = 0.0
+
+    def begin_frame(self):
+        if not self.Enabled:
+            return
+        self._Start = self._Last = time.perf_counter()
+        row = self._Row
+        for i in range(len(row)):
+            row[i] = 0.0
+
+    def mark(self, phase: str):
+        """
+        The time since the last mark (or begin_frame) was spent in phase
+        """
+        if not self.Enabled or not self._Start:
+            return
+        now = time.perf_counter()
+        self._Row[self._Slots[phase]] += now - self._Last
+        self._Last = now
+
+    def end_frame(self):
+        if not self.Enabled or not self._Start:
+            return
+        samples = self.Samples
+        base = (self.Count % self.Size)*self._Width
+        for i, v in enumerate(self._Row):
+            samples[base+i] = v
+        samples[base+self._Width-1] = time.perf_counter() - self._Start
+        self.Count += 1
+        self._Start = 0.0
+
+    def frames(self) -> list[list[float]]:
+        """
+        Recorded rows, oldest first
+        """
+        rows = []
+        for i in range(max(self.Count - self.Size, 0), self.Count):
+            base = (i % self.Size)*self._Width
+            rows.append(self.Samples[base:base+self._Width].tolist())
+        return rows
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """
+        Mean, median, 95th, 99th percentile and max of each phase in ms
+        """
+        rows = self.frames()
+        result = {}
+        for i, name in enumerate(self.Phases + ('frame',)):
+            values = sorted(v[i]*1000 for v in rows)
+            if not values:
+                continue
+            pick = lambda q: values[min(int(q*len(values)), len(values)-1)]
+            result[name] = {
+                'mean': sum(values)/len(values),
+                'p50': pick(0.5),
+                'p95': pick(0.95),
+                'p99': pick(0.99),
+                'max': values[-1],
+            }
+        return result
+
+    def export_json(self, path: str):
+        with open(path, 'w') as f:
+            json.dump({
+                'phases': list(self.Phases),
+                'summary_ms': self.summary(),
+                # seconds, each row is the phases in order then the whole frame
+                'frames': self.frames(),
+            }, f)
+
+    def export_csv(self, path: str):
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['frame', *(f'{v}_ms' for v in self.Phases), 'frame_ms'])
+            first = max(self.Count - self.Size, 0)
+            for i, row in enumerate(self.frames()):
+                writer.writerow([first+i, *(f'{v*1000:.4f}' for v in row)])
+
+    def draw_overlay(self, surface: pygame.Surface) -> typing.Union[pygame.Rect, None]:
+        """
+        Draws a scrolling graph of the frames onto surface, one column per frame stacked by
+        phase with a line at Budget. Returns the area drawn
+        """
+        if not self.Enabled or not self.Count:
+            return None
+        w, h = self.OverlaySize
+        if self._Graph is None or self._Graph.get_size() != (w, h):
+            self._Graph = pygame.Surface((w, h))
+            self._Graph.fill((0, 0, 0))
+            self._Font = pygame.font.SysFont(None, 16)
+        graph = self._Graph
+
+        # only the newest frame is drawn, older columns scroll left
+        graph.scroll(-1, 0)
+        graph.fill((0, 0, 0), (w-1, 0, 1, h))
+        px_per_s = (h*0.5)/self.Budget
+        base = ((self.Count-1) % self.Size)*self._Width
+        y = h
+        for i, name in enumerate(self.Phases):
+            size = int(self.Samples[base+i]*px_per_s)
+            if size > 0:
+                graph.fill(PHASE_COLORS.get(name, (255, 255, 255)), (w-1, y-size, 1, size))
+                y -= size
+        graph.fill((0, 255, 0), (w-1, h//2, 1, 1))
+
+        # means of the last 60 frames, only redrawn every 30 so they stay readable
+        if self._Labels is None or self.Count - self._LabelsAt >= 30:
+            self._LabelsAt = self.Count
+            recent = min(self.Count, self.Size, 60)
+            means = [0.0]*self._Width
+            for n in range(self.Count-recent, self.Count):
+                base = (n % self.Size)*self._Width
+                for i in range(self._Width):
+                    means[i] += self.Samples[base+i]/recent
+            lines = [f'{v} {means[i]*1000:.2f}ms' for i, v in enumerate(self.Phases + ('frame',))]
+            font = self._Font
+            self._Labels = pygame.Surface((w, font.get_linesize()*len(lines))) #type: ignore
+            for i, line in enumerate(lines):
+                name = line.split(' ')[0]
+                self._Labels.blit(font.render(line, True, PHASE_COLORS.get(name, (255, 255, 255))), (2, i*font.get_linesize())) #type: ignore
+
+        x, y = self.OverlayPos
+        surface.blit(graph, (x, y))
+        surface.blit(self._Labels, (x, y+h)) #type: ignore
+        return pygame.Rect(x, y, w, h + self._Labels.get_height()) #type: ignore
+
+PROFILER = FrameProfiler()
@@ -0,0 +1,116 @@
+from __future__ import annotations
+import pygame
+import typing
+import json
+import gzip
+import hashlib
+
+from . import tween_handler
+from . import sprite_handler
+from . import ui_handler
+
+REPLAY_VERSION = 1
+# everything else (window focus, audio devices..) does not reach the game
+RECORDED_EVENTS = {
+    pygame.QUIT, pygame.KEYDOWN, pygame.KEYUP, pygame.TEXTINPUT,
+    pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEWHEEL,
+    pygame.VIDEORESIZE,
+}
+
+def encode_event(ev: pygame.event.Event) -> list:
+    attrs = {k: v for k, v in ev.dict.items() if isinstance(v, (bool, int, float, str, tuple, list))}
+    return [ev.type, attrs]
+
+def decode_event(data: list) -> pygame.event.Event:
+    ev_type, attrs = data
+    return pygame.event.Event(ev_type, {k: tuple(v) if isinstance(v, list) else v for k, v in attrs.items()})
+
+def state_digest() -> str:
+    """
+    Hash of the tweens, loops, animations and stage, equal when two runs ended up in the same state
+    """
+    tweens = sorted(repr((v.EaseStyle, v.Time, v.Delay, v.A, v.B, v.Active)) for v in tween_handler.all_tweens())
+    loops = sorted(repr((v.Time, v.Count, v.Delay, v.Timeout, v.Active)) for v in tween_handler.LOOPS.values())
+    anims = sorted(repr((v.Frame, v.InternalTime, v.CurrentLoop, v.Playing)) for v in sprite_handler.ANIMOBJ.values())
+    stage = sorted(repr((type(v).__name__, v.PxPos, tuple(v.Bounds), v.OnStack, v.ZIndex,
+                         getattr(v, 'Text', None), getattr(v, 'Revealed', None),
+                         getattr(getattr(v, 'Asset', None), 'Path', None))) for v in ui_handler.UIOBJ.values())
+    digest = hashlib.sha1()
+    for part in (tweens, loops, anims, stage):
+        digest.update('\n'.join(part).encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+class Recorder:
+    """
+    Writes the events, dt and pointer of every frame to a gzipped json lines file
+    """
+    def __init__(self, path: str, header: dict) -> None:
+        self.Path = path
+        self.Frames = 0
+        self._File = gzip.open(path, 'wt')
+        self._File.write(json.dumps({'version': REPLAY_VERSION, **header}) + '\n')
+
+    def record(self, dt: float, mouse_pos: tuple[int, int], events: list[pygame.event.Event]):
+        frame: list = [dt, mouse_pos[0], mouse_pos[1]]
+        recorded = [encode_event(v) for v in events if v.type in RECORDED_EVENTS]
+        if recorded:
+            frame.append(recorded)
+        self._File.write(json.dumps(frame, separators=(',', ':')) + '\n')
+        self.Frames += 1
+
+    def close(self, digest: typing.Union[str, None] = None):
+        """
+        digest is the state the recording ended in, replays check theirs against it
+        """
+        if self._File.closed:
+            return
+        self._File.write(json.dumps({'frames': self.Frames, 'digest': digest}) + '\n')
+        self._File.close()
+
+class Replayer:
+    """
+    Reads a recording back frame by frame
+    """
+    def __init__(self, path: str) -> None:
+        self.Path = path
+        self._File = gzip.open(path, 'rt')
+        self.Header: dict = json.loads(self._File.readline())
+        if self.Header.get('version') != REPLAY_VERSION:
+            raise ValueError(f'{path} is recording version {self.Header.get("version")}, expected {REPLAY_VERSION}')
+        self.Frames = 0
+        self.Finished = False
+        # the closing line, once reached
+        self.Footer: dict = {}
+
+    def next_frame(self) -> typing.Union[tuple[float, tuple[int, int], list[pygame.event.Event]], None]:
+        """
+        dt, pointer and events of the next frame, None once the recording is over
+        """
+        if self.Finished:
+            return None
+        line = self._File.readline()
+        data = json.loads(line) if line else None
+        if not isinstance(data, list):
+            self.Footer = data or {}
+            self.Finished = True
+            self._File.close()
+            return None
+        self.Frames += 1
+        events = [decode_event(v) for v in data[3]] if len(data) > 3 else []
+        return (data[0], (data[1], data[2]), events)
+
+    def check(self, digest: str) -> bool:
+        """
+        True when digest is the state the recording ended in, false when stopped before its end
+        """
+        frames = self.Frames
+        while self.next_frame() is not None:
+            pass
+        stopped_early = self.Frames != frames
+        self.Frames = frames
+        return not stopped_early and self.Footer.get('digest') == digest
+
+    def close(self):
+        self.Finished = True
+        self._File.close()
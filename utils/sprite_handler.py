@@ -2,27 +2,52 @@ from __future__ import annotations
 import pygame
 import typing
 import uuid
+from collections import OrderedDict
 
 from . import ui_handler
+from . import asset_handler
 
 ANIMOBJ: dict[str, Animation] = {}
+# top left of every frame, shared by every track with the same frame size and grid.
+# resizing makes new frame sizes, least recently used tables are dropped past the limit
+FRAME_TABLE_CACHE_SIZE = 64
+FRAME_TABLES: OrderedDict[tuple[tuple[int, int], tuple[int, int]], tuple[tuple[int, int], ...]] = OrderedDict()
+
+def frame_table(dimentions: tuple[int, int], grid: tuple[int, int]) -> tuple[tuple[int, int], ...]:
+    """
+    Frame positions of a sheet row by row, built once per layout
+    """
+    key = (dimentions, grid)
+    table = FRAME_TABLES.get(key)
+    if table is None:
+        table = FRAME_TABLES[key] = tuple((x*dimentions[0], y*dimentions[1]) for y in range(grid[1]) for x in range(grid[0]))
+        if len(FRAME_TABLES) > FRAME_TABLE_CACHE_SIZE:
+            FRAME_TABLES.popitem(last=False)
+    else:
+        FRAME_TABLES.move_to_end(key)
+    return table
 
 def update_all(dt: float):
     for v in list(ANIMOBJ.values()):
-        v.step_dt(dt)
+        # same as step_dt, most frames switch no frame at all
+        v.InternalTime += dt*v.AnimSpeed
+        if v.InternalTime >= v.TimeTilNextFrame:
+            v._catch_up()
 
 class Animation:
     """
     Animation class
     """
     def __init__(self, sprite: AnimatableSprite, source: str, dimentions: tuple[int, int], grid: tuple[int, int], length: float):
-        self.Surface = pygame.image.load(source)
-        self.Surface = self.Surface.convert_alpha()
+        self.Asset = asset_handler.ASSETS.acquire(source)
         self.Dimentions = dimentions
+        self.SourceDimentions = dimentions
+        self.BaseSize = sprite.Surface.get_size() # the sprite's size when the track was loaded
         self.Grid = grid
         self.ID = str(uuid.uuid4())
 
         self.DrawCanvas = pygame.Rect(0, 0, self.Dimentions[0], self.Dimentions[1])
+        self.FrameTable = frame_table(self.Dimentions, self.Grid)
         
         self.AnimSpeed = 1
         self.Playing = False
@@ -35,30 +60,45 @@ class Animation:
         self.CurrentLoop = 0
         self.Loops = 0
 
-    def step(self):
+    def step(self, frames: int = 1):
         """
-        Steps the animation by 1 frame
+        Steps the animation by frames, counting every loop passed on the way
         """
-        self.Frame += 1
-        if self.Frame >= self.TotalFrames:
-            self.Frame = 0
-            self.CurrentLoop += 1
-            if self.CurrentLoop > self.Loops:
-                # end animation
-                self.stop_animation()
-        x_pos, y_pos = self.Frame%self.Grid[0], self.Frame//self.Grid[1]
-        self.DrawCanvas.x = x_pos*self.Dimentions[0]
-        self.DrawCanvas.y = y_pos*self.Dimentions[1]
+        frame = self.Frame + frames
+        if frame >= self.TotalFrames:
+            self.CurrentLoop += frame//self.TotalFrames
+            frame %= self.TotalFrames
+        self.Frame = frame
+        if self.CurrentLoop > self.Loops:
+            # end animation
+            self.stop_animation()
+        self._place()
         self.Sprite.DrawArea = self.DrawCanvas
+
+    def _place(self):
+        self.DrawCanvas.topleft = self.FrameTable[self.Frame]
+
+    def rescale(self, scale: tuple[float, float]):
+        """
+        Scales the frame rect from the original sheet's frame size
+        """
+        self.Dimentions = (int(self.SourceDimentions[0]*scale[0]), int(self.SourceDimentions[1]*scale[1]))
+        self.DrawCanvas.width, self.DrawCanvas.height = self.Dimentions
+        self.FrameTable = frame_table(self.Dimentions, self.Grid)
+        self._place()
     
     def step_dt(self, dt: float):
         """
-        Steps the animation by time, calls .step when frame should switch
+        Steps the animation by time, skipping every frame dt passed over
         """
         self.InternalTime += (dt*self.AnimSpeed)
         if self.InternalTime >= self.TimeTilNextFrame:
-            self.InternalTime = self.InternalTime%self.TimeTilNextFrame
-            self.step()
+            self._catch_up()
+
+    def _catch_up(self):
+        frames = int(self.InternalTime//self.TimeTilNextFrame)
+        self.InternalTime = self.InternalTime%self.TimeTilNextFrame
+        self.step(frames)
 
     def stop_animation(self):
         """
@@ -72,6 +112,14 @@ class Animation:
 
         del ANIMOBJ[self.ID]
 
+    def unload(self):
+        """
+        Stops the animation and lets go of its sheet, do not use it after
+        """
+        if self.ID in ANIMOBJ:
+            self.stop_animation()
+        asset_handler.ASSETS.release(self.Asset)
+
     def play_animation(self, loops: int = 0):
         """
         Play the animation, note that resizing the character during animation is not tested
@@ -100,8 +148,25 @@ class AnimatableSprite(ui_handler.ImageUI):
         """
         Returns an animation track from given sprite, dimention, grid, and animation length
         """
+        self.unload_track(track_name)
         self.Tracks[track_name] = Animation(self, source, dimentions, grid, length)
         return self.Tracks[track_name]
+
+    def unload_track(self, track_name: str):
+        """
+        Removes a track and lets go of its sheet
+        """
+        track = self.Tracks.pop(track_name, None)
+        if track is not None:
+            track.unload()
+
+    def unload(self):
+        """
+        Hides the sprite and lets go of its image and every track's sheet, do not use it after
+        """
+        for name in list(self.Tracks):
+            self.unload_track(name)
+        super().unload()
     
     def get_animation(self, track_name: str) -> tuple[bool, typing.Union[Animation, None]]:
         """
@@ -115,11 +180,10 @@ class AnimatableSprite(ui_handler.ImageUI):
     #overwrite to accomodate dimention change
     def update_rect_size(self):
         surfRect = self.Surface.get_rect()
-        x_diff, y_diff = surfRect.width/self.Bounds.width, surfRect.height/self.Bounds.height
         self.Bounds.width, self.Bounds.height = surfRect.width, surfRect.height
         self.DrawArea.width, self.DrawArea.height = surfRect.width, surfRect.height
-        
+        self.mark_moved()
+
+        # tracks scale with the sprite from their original sheet
         for v in self.Tracks.values():
-            v.Surface = pygame.transform.scale(v.Surface, (surfRect.width, surfRect.height))
-            v.Dimentions = (int(v.Dimentions[0]*x_diff), int(v.Dimentions[1]*y_diff))
-            v.DrawCanvas.width, v.DrawCanvas.height = v.Dimentions[0], v.Dimentions[1]
\ No newline at end of file
+            v.rescale((surfRect.width/v.BaseSize[0], surfRect.height/v.BaseSize[1]))
\ No newline at end of file
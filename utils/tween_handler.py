@@ -2,10 +2,74 @@ from __future__ import annotations
 import typing
 import uuid
 import math
+import weakref
+import heapq
+import itertools
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 TWEENS: dict[str, Tween] = {}
 LOOPS: dict[str, Loop] = {}
 
+# clock times of the next loop ticks, the loops due at each are in _DUE. killed ones are skipped when due
+_CLOCK = 0.0
+_SCHEDULE: list[float] = []
+_DUE: dict[float, list[Loop]] = {}
+_TIMEOUTS: list[tuple[float, int, Loop]] = []
+_PENDING: list[Loop] = [] # made since the last update, scheduled at the start of the next
+_SEQ = itertools.count()
+
+# property tweens by (id(object), attribute, component), a new one retires the last. see TweenProperty
+_BOUND: weakref.WeakValueDictionary[tuple[int, str, typing.Union[int, None]], TweenProperty] = weakref.WeakValueDictionary()
+# property values set by tweens this update, written once per attribute by _flush_writes.
+# pooled tweens on a whole property are written by their pool instead, see TweenPool.update
+_WRITES: dict[tuple[int, str], tuple[typing.Any, str, dict[typing.Union[int, None], typing.Any]]] = {}
+
+# the value before and after the last update of every property tweens wrote, see set_interpolation
+INTERPOLATE = False
+_INTERP: dict[tuple[int, str], tuple[typing.Any, str, typing.Any, typing.Any]] = {}
+_SHOWN: list[tuple[typing.Any, str, typing.Any, typing.Any]] = []
+
+def set_interpolation(state: bool):
+    """
+    Toggles remembering what property tweens wrote in the last update, so interpolate can show
+    a point between the last two updates
+    """
+    global INTERPOLATE
+    INTERPOLATE = state
+    _INTERP.clear()
+
+# structure of arrays tween engine, needs numpy. see use_vectorized
+VECTORIZED = False
+POOLS: dict[tuple[int, bool], TweenPool] = {}
+
+def use_vectorized(state: bool = True) -> bool:
+    """
+    Toggles keeping new tweens in numpy arrays, updated a whole easing style at a time.
+    Tweens already running stay where they are. Returns whether it is on, it stays off without numpy
+    """
+    global VECTORIZED
+    VECTORIZED = state and np is not None
+    return VECTORIZED
+
+def tween_count() -> int:
+    """
+    Running tweens, vectorized or not
+    """
+    return len(TWEENS) + sum(v.Count for v in POOLS.values())
+
+def all_tweens() -> typing.Iterator[Tween]:
+    """
+    Every running tween, the vectorized ones with Time, Alpha and Active brought up to date
+    """
+    yield from TWEENS.values()
+    for pool in POOLS.values():
+        pool.sync()
+        yield from pool.Owners
+
 def ease_out_bounce(v: float) -> float: #thx chatgpt for this
     n1 = 7.5625
     d1 = 2.75
@@ -52,6 +116,105 @@ EASE_STYLE: dict[str, typing.Callable[[float], float]] = {
     'elastic': elastic
 }
 
+# easings are compiled into tables of EASE_RESOLUTION samples, looked up with linear interpolation
+EASE_RESOLUTION = 1024
+EASE_TABLES: dict[str, EaseTable] = {}
+
+def _lookup(samples: list[float]) -> typing.Callable[[float], float]:
+    last = len(samples) - 1
+    def ease(v: float) -> float:
+        if v <= 0:
+            return samples[0]
+        pos = v*last
+        i = int(pos)
+        if i >= last:
+            return samples[last]
+        a = samples[i]
+        return a + (samples[i+1] - a)*(pos - i)
+    return ease
+
+# cheaper to run than to look up in python, even elastic since exp and cos are in C.
+# scalar tweens call these directly, the vectorized engine still uses their tables
+_DIRECT = (linear, ease_in_quad, ease_out_quad, ease_in_out_quad, ease_out_bounce, elastic)
+
+class EaseTable:
+    """
+    An easing sampled at EASE_RESOLUTION evenly spaced points from 0 to 1, called like the easing
+    """
+    def __init__(self, samples: list[float], direct: typing.Union[typing.Callable[[float], float], None] = None) -> None:
+        self.Samples = samples
+        self._Array = np.array(samples) if np is not None else None
+        # what scalar tweens call
+        self.Scalar = direct or _lookup(samples)
+
+    @classmethod
+    def compile(cls, func: typing.Callable[[float], float]) -> EaseTable:
+        samples = [func(i/(EASE_RESOLUTION-1)) for i in range(EASE_RESOLUTION)]
+        return cls(samples, func if func in _DIRECT else None)
+
+    def __call__(self, v: float) -> float:
+        return self.Scalar(v)
+
+def get_ease(style: str) -> EaseTable:
+    """
+    The table for an EASE_STYLE name, compiled on first use. Unknown names are linear
+    """
+    table = EASE_TABLES.get(style)
+    if table is None:
+        func = EASE_STYLE.get(style, linear)
+        table = EASE_TABLES[style] = func if isinstance(func, EaseTable) else EaseTable.compile(func)
+    return table
+
+def define_ease(name: str, func: typing.Callable[[float], float]) -> EaseTable:
+    """
+    Adds or replaces an easing style, tweens made from now on use it
+    """
+    table = func if isinstance(func, EaseTable) else EaseTable.compile(func)
+    EASE_STYLE[name] = table
+    EASE_TABLES[name] = table
+    return table
+
+def define_bezier(name: str, x1: float, y1: float, x2: float, y2: float) -> EaseTable:
+    """
+    Adds a cubic bezier easing from (0, 0) to (1, 1) with control points (x1, y1) and (x2, y2),
+    the same as css cubic-bezier(). x1 and x2 are kept within 0 and 1
+    """
+    x1, x2 = min(max(x1, 0.0), 1.0), min(max(x2, 0.0), 1.0)
+    bezier = lambda a, b, t: 3*a*(1-t)*(1-t)*t + 3*b*(1-t)*t*t + t*t*t
+    def ease(x: float) -> float:
+        # x of the curve only grows with t, bisect for the t at x
+        low, high = 0.0, 1.0
+        for _ in range(40):
+            t = (low + high)/2
+            if bezier(x1, x2, t) < x:
+                low = t
+            else:
+                high = t
+        return bezier(y1, y2, (low + high)/2)
+    return define_ease(name, ease)
+
+def define_keyframes(name: str, keys: list[tuple]) -> EaseTable:
+    """
+    Adds an easing through keys of (time, value) or (time, value, style), times from 0 to 1 in order.
+    A key's style eases the stretch leading up to it, linear by default. Before the first key and
+    after the last the value holds
+    """
+    keys = sorted(keys, key=lambda k: k[0])
+    styles = [get_ease(k[2]) if len(k) > 2 else None for k in keys]
+    def ease(x: float) -> float:
+        if x <= keys[0][0]:
+            return keys[0][1]
+        for i in range(1, len(keys)):
+            t1, v1 = keys[i][0], keys[i][1]
+            if x <= t1:
+                t0, v0 = keys[i-1][0], keys[i-1][1]
+                alpha = (x - t0)/(t1 - t0) if t1 > t0 else 1.0
+                if styles[i]:
+                    alpha = styles[i](alpha) #type: ignore
+                return v0 + (v1 - v0)*alpha
+        return keys[-1][1]
+    return define_ease(name, ease)
+
 class Tween:
     """
     Tween class allowing you to tween value A->B
@@ -64,63 +227,442 @@ class Tween:
         self.Delay = time
         self.Alpha = 0.0
         self.EaseStyle = easeStyle
+        self.Ease = get_ease(easeStyle)
         self.Callback = callback
         self.Active = True
 
         self.Index = str(uuid.uuid4())
-        TWEENS[self.Index] = self
+        self._Pool: typing.Union[TweenPool, None] = None
+        self._Slot = 0
+        if VECTORIZED:
+            scalar = not isinstance(initial, (list, tuple))
+            width = 1 if scalar else len(initial) #type: ignore
+            key = (width, scalar)
+            if key not in POOLS:
+                POOLS[key] = TweenPool(width, scalar)
+            POOLS[key].add(self)
+        else:
+            TWEENS[self.Index] = self
 
     def get_now(self) -> typing.Any:
         """
         Gets the current value.
         """
-        alpha = self.Alpha
-        if self.EaseStyle in EASE_STYLE:
-            alpha = EASE_STYLE[self.EaseStyle](alpha)
+        if self._Pool:
+            self._Pool.sync_one(self)
+        alpha = self.Ease.Scalar(self.Alpha)
         return self.A+((self.B-self.A)*alpha)
     
     def kill(self):
         self.Active = False
+        if self._Pool:
+            self._Pool.Active[self._Slot] = False
     
 class TweenTuple(Tween):
     def __init__(self, time: float, target: list[float], initial: list[float], easeStyle: str = 'linear', callback: typing.Union[typing.Callable[[float]], None] = None) -> None:
-        super().__init__(time, 0, 0, easeStyle, callback)
-        self.A = initial
-        self.B = target 
+        super().__init__(time, target, initial, easeStyle, callback) #type: ignore
     
     def get_now(self):
         """
         Gets the current value.
         """
-        alpha = self.Alpha
-        if self.EaseStyle in EASE_STYLE:
-            alpha = EASE_STYLE[self.EaseStyle](alpha)
-        RESULT = []
-        for i, v in enumerate(self.A):
-            A, B = v, self.B[i]
-            RESULT.append(A+((B-A)*alpha))
-
-        return tuple(RESULT)
+        if self._Pool:
+            self._Pool.sync_one(self)
+        alpha = self.Ease.Scalar(self.Alpha)
+        return tuple(A+((B-A)*alpha) for A, B in zip(self.A, self.B))
+
+def _binder(obj: typing.Any, attr: str, component: typing.Union[int, None]) -> typing.Callable[[typing.Any], None]:
+    # holds no reference to the tween so _BOUND lets go once it is finished
+    key = (id(obj), attr)
+    def stage(value: typing.Any):
+        if key not in _WRITES:
+            _WRITES[key] = (obj, attr, {})
+        _WRITES[key][2][component] = value
+    return stage
+
+def _flush_writes():
+    """
+    Writes the values property tweens staged, one setattr per attribute
+    """
+    for key, (obj, attr, values) in _WRITES.items():
+        value = values.pop(None) if None in values else getattr(obj, attr)
+        if values:
+            current = list(value)
+            for component, v in values.items():
+                current[component] = v
+            value = tuple(current)
+        if INTERPOLATE:
+            _INTERP[key] = (obj, attr, getattr(obj, attr), value)
+        setattr(obj, attr, value)
+    _WRITES.clear()
+
+def _lerp(a: typing.Any, b: typing.Any, alpha: float) -> typing.Any:
+    if isinstance(b, (list, tuple)):
+        return tuple(x+(y-x)*alpha for x, y in zip(a, b))
+    return a+(b-a)*alpha
+
+def interpolate(alpha: float):
+    """
+    Sets what property tweens wrote in the last update to alpha of the way from the value before it.
+    Properties set by anything else since are left alone and dropped. Call restore once drawn
+    """
+    for key, (obj, attr, before, after) in list(_INTERP.items()):
+        if getattr(obj, attr) is not after:
+            del _INTERP[key]
+            continue
+        shown = _lerp(before, after, alpha)
+        _SHOWN.append((obj, attr, shown, after))
+        setattr(obj, attr, shown)
+
+def restore():
+    """
+    Puts back the values interpolate replaced, unless something set them since
+    """
+    for obj, attr, shown, after in _SHOWN:
+        if getattr(obj, attr) is shown:
+            setattr(obj, attr, after)
+    _SHOWN.clear()
+
+class FixedStep:
+    """
+    Turns frame times into a whole number of fixed updates. What is left over is Alpha, how far
+    the frame is between the last update and the next. At most MaxSteps run per frame, the rest is dropped
+    """
+    def __init__(self, rate: float = 60, max_steps: int = 5) -> None:
+        self.Step = 1/rate
+        self.MaxSteps = max_steps
+        self.Accumulator = 0.0
+        self.Dropped = 0.0 # seconds not simulated because a frame was too long
+
+    @property
+    def Alpha(self) -> float:
+        return self.Accumulator/self.Step
+
+    def advance(self, dt: float) -> int:
+        """
+        Updates to run for a frame that took dt
+        """
+        self.Accumulator += dt
+        # frame times that are a multiple of Step should not come up a hair short
+        steps = int(self.Accumulator/self.Step + 1e-6)
+        if steps > self.MaxSteps:
+            self.Dropped += (steps - self.MaxSteps)*self.Step
+            self.Accumulator -= (steps - self.MaxSteps)*self.Step
+            steps = self.MaxSteps
+        self.Accumulator = max(self.Accumulator - steps*self.Step, 0.0)
+        return steps
+
+class TweenProperty(TweenTuple):
+    """
+    Tweens obj.attr, or one component of it when it is a tuple, without a callback. Starts from the
+    current value unless initial is given. Starting one on a target stops the tween running there,
+    a whole value and its components count as the same target
+    """
+    def __init__(self, time: float, target: typing.Any, obj: typing.Any, attr: str, component: typing.Union[int, None] = None,
+                 easeStyle: str = 'linear', initial: typing.Any = None) -> None:
+        if initial is None:
+            initial = getattr(obj, attr)
+            if component is not None:
+                initial = initial[component]
+        self.Scalar = not isinstance(target, (list, tuple))
+        if not self.Scalar:
+            target, initial = list(target), list(initial)
+        self.Target = (obj, attr, component)
+
+        # retire whatever is tweening the same thing
+        width = len(getattr(obj, attr)) if component is None and not self.Scalar else 0
+        for c in (None, component) if component is not None else (None, *range(width)):
+            old = _BOUND.get((id(obj), attr, c))
+            if old is not None:
+                old.kill()
+        super().__init__(time, target, initial, easeStyle, _binder(obj, attr, component))
+        _BOUND[(id(obj), attr, component)] = self
+
+    def get_now(self):
+        if self.Scalar:
+            return Tween.get_now(self)
+        return TweenTuple.get_now(self)
+
+    def _scale(self, factors: tuple[float, ...]):
+        if self.Scalar:
+            self.A, self.B = self.A*factors[0], self.B*factors[0]
+        else:
+            self.A = [v*f for v, f in zip(self.A, factors)]
+            self.B = [v*f for v, f in zip(self.B, factors)]
+        if self._Pool is not None:
+            self._Pool.A[self._Slot] = self.A
+            self._Pool.B[self._Slot] = self.B
+
+def scale_property(obj: typing.Any, attr: str, factors: tuple[float, ...]):
+    """
+    Scales the start and target of the tweens running on obj.attr or its components, one factor
+    per component. For when what the value is measured in changes, like the stage resizing
+    """
+    for c in (None, *range(len(factors))):
+        tween = _BOUND.get((id(obj), attr, c))
+        if tween is not None and tween.Active:
+            tween._scale(factors if c is None else (factors[c],))
+
+class TweenPool:
+    """
+    Vectorized tweens with the same number of values. Start, target, elapsed time, duration and
+    easing of each are rows in arrays, finished rows are compacted away every update
+    """
+    def __init__(self, width: int, scalar: bool, capacity: int = 64) -> None:
+        self.Width = width
+        self.Scalar = scalar # callbacks get a float instead of a tuple
+        self.Count = 0
+        self.Owners: list[Tween] = []
+        self.A = np.zeros((capacity, width))
+        self.B = np.zeros((capacity, width))
+        self.Time = np.zeros(capacity)
+        self.Delay = np.zeros(capacity)
+        self.Ease = np.zeros(capacity, np.int32)
+        self.Active = np.zeros(capacity, bool)
+        # TweenProperty on a whole property, written straight from the arrays without a callback
+        self.Direct = np.zeros(capacity, bool)
+        # every easing in use stacked into one array, Ease are rows of it
+        self._EaseIds: dict[EaseTable, int] = {}
+        self._Tables = np.zeros((0, EASE_RESOLUTION))
+
+    def _grow(self):
+        capacity = len(self.Time)*2
+        for name in ('A', 'B', 'Time', 'Delay', 'Ease', 'Active', 'Direct'):
+            old = getattr(self, name)
+            new = np.zeros((capacity, *old.shape[1:]), old.dtype)
+            new[:self.Count] = old[:self.Count]
+            setattr(self, name, new)
+
+    def add(self, tween: Tween):
+        if self.Count == len(self.Time):
+            self._grow()
+        i = self.Count
+        self.A[i] = tween.A
+        self.B[i] = tween.B
+        self.Time[i] = tween.Time
+        self.Delay[i] = tween.Delay
+        table = tween.Ease
+        if table not in self._EaseIds:
+            self._EaseIds[table] = len(self._Tables)
+            self._Tables = np.vstack((self._Tables, table._Array))
+        self.Ease[i] = self._EaseIds[table]
+        self.Active[i] = True
+        self.Direct[i] = isinstance(tween, TweenProperty) and tween.Target[2] is None
+        tween._Pool = self
+        tween._Slot = i
+        self.Owners.append(tween)
+        self.Count += 1
+
+    def _alpha(self, n: int):
+        delay = self.Delay[:n]
+        return np.where(delay <= 0, 1.0, np.minimum(self.Time[:n]/np.where(delay <= 0, 1.0, delay), 1.0))
+
+    def sync_one(self, tween: Tween):
+        i = tween._Slot
+        delay = self.Delay[i]
+        tween.Time = float(self.Time[i])
+        tween.Alpha = 1 if delay <= 0 else min(tween.Time/delay, 1)
+        tween.Active = bool(self.Active[i])
+
+    def sync(self):
+        """
+        Writes Time, Alpha and Active back onto the tweens
+        """
+        n = self.Count
+        for tween, time, alpha, active in zip(self.Owners, self.Time[:n].tolist(), self._alpha(n).tolist(), self.Active[:n].tolist()):
+            tween.Time = time
+            tween.Alpha = alpha
+            tween.Active = active
+
+    def update(self, dt: float):
+        n = self.Count
+        if n == 0:
+            return
+        self.Time[:n] += dt
+        alpha = self._alpha(n)
+        done = (alpha >= 1) | ~self.Active[:n]
+
+        # every style at once, each row looks up its own table
+        last = EASE_RESOLUTION - 1
+        pos = alpha*last
+        i = np.minimum(pos.astype(np.int32), last-1)
+        ease = self.Ease[:n]
+        low = self._Tables[ease, i]
+        eased = low + (self._Tables[ease, i+1] - low)*(pos - i)
+        values = self.A[:n] + (self.B[:n] - self.A[:n])*eased[:, None]
+
+        owners = self.Owners
+        direct = ~done & self.Direct[:n]
+        if direct.any():
+            # nothing else writes a whole property while its tween runs, set them in one pass
+            rows = np.flatnonzero(direct)
+            targets = [owners[i].Target for i in rows.tolist()]
+            picked = values[rows, 0].tolist() if self.Scalar else map(tuple, values[rows].tolist())
+            if INTERPOLATE:
+                for (obj, attr, _), value in zip(targets, picked):
+                    _INTERP[(id(obj), attr)] = (obj, attr, getattr(obj, attr), value)
+                    setattr(obj, attr, value)
+            else:
+                for (obj, attr, _), value in zip(targets, picked):
+                    setattr(obj, attr, value)
+
+        values = values.tolist()
+        for i in np.flatnonzero(~done & ~self.Direct[:n]).tolist():
+            tween = owners[i]
+            if not tween.Callback:
+                continue
+            try:
+                tween.Callback(values[i][0] if self.Scalar else tuple(values[i]))
+            except Exception as e:
+                print(f'error at tween {e}')
+                continue
+
+        if done.any():
+            # tweens added by the callbacks are past n and stay
+            keep = np.concatenate((np.flatnonzero(~done), np.arange(n, self.Count)))
+            first = int(np.argmax(done))
+            for i in np.flatnonzero(done).tolist():
+                self.sync_one(owners[i])
+                owners[i]._Pool = None
+            for name in ('A', 'B', 'Time', 'Delay', 'Ease', 'Active', 'Direct'):
+                array = getattr(self, name)
+                array[:len(keep)] = array[keep]
+            self.Owners = owners = [owners[i] for i in keep.tolist()]
+            self.Count = len(keep)
+            for i in range(first, self.Count):
+                owners[i]._Slot = i
     
 class Loop:
     """
     Loop class allowing you to have a callback every n float.
+    Runs every tick it owes when a frame covers several, coalesce calls back once with the latest count instead
     """
-    def __init__(self, time: float, callback: typing.Union[typing.Callable[[int]], None] = None, timeout: typing.Union[float, None] = None) -> None:
-        self.Time = 0.0
+    def __init__(self, time: float, callback: typing.Union[typing.Callable[[int]], None] = None, timeout: typing.Union[float, None] = None,
+                 coalesce: bool = False) -> None:
+        self.Start = _CLOCK
         self.Count = 0
         self.Delay = time
         self.Callback = callback
         self.Timeout = timeout
+        self.Coalesce = coalesce
         self.Active = True
 
         self.Index = str(uuid.uuid4())
         LOOPS[self.Index] = self
+        _PENDING.append(self)
+
+    @property
+    def Time(self) -> float:
+        return _CLOCK - self.Start
 
     def kill(self):
         self.Active = False
+        LOOPS.pop(self.Index, None)
+
+    def _owed(self, now: float) -> int:
+        """
+        Ticks due by now and before the timeout
+        """
+        # ticks on or after the timeout never run
+        deadline = self.Start + self.Timeout if self.Timeout else math.inf
+        if self.Delay <= 0:
+            return 1 if now < deadline else 0
+        due = lambda k: self.Start + k*self.Delay
+        owed = int((min(now, deadline) - self.Start)/self.Delay) - self.Count + 1
+        # float rounding at the edges
+        while owed > 0 and not (due(self.Count+owed-1) <= now and due(self.Count+owed-1) < deadline):
+            owed -= 1
+        while due(self.Count+owed) <= now and due(self.Count+owed) < deadline:
+            owed += 1
+        return max(owed, 0)
+
+def clear_loops():
+    """
+    Stops every loop and drops everything scheduled for them, instead of clearing LOOPS
+    """
+    for loop in LOOPS.values():
+        loop.Active = False
+    LOOPS.clear()
+    _SCHEDULE.clear()
+    _DUE.clear()
+    _TIMEOUTS.clear()
+    _PENDING.clear()
+
+def _schedule(time: float, loop: Loop):
+    # loops made together with the same delay stay due at the same time, they share a heap entry
+    bucket = _DUE.get(time)
+    if bucket is None:
+        _DUE[time] = [loop]
+        heapq.heappush(_SCHEDULE, time)
+    else:
+        bucket.append(loop)
+
+def _update_loops(dt: float):
+    global _CLOCK
+    _CLOCK += dt
+    now = _CLOCK
+    for loop in _PENDING:
+        _schedule(loop.Start, loop)
+        if loop.Timeout:
+            heapq.heappush(_TIMEOUTS, (loop.Start + loop.Timeout, next(_SEQ), loop))
+    _PENDING.clear()
+
+    active = LOOPS.get
+    again = []
+    while _SCHEDULE and _SCHEDULE[0] <= now:
+        for loop in _DUE.pop(heapq.heappop(_SCHEDULE)):
+            # killed, or LOOPS was cleared
+            if not loop.Active or active(loop.Index) is not loop:
+                continue
+            count, delay, start = loop.Count, loop.Delay, loop.Start
+            if not loop.Timeout and delay > 0 and start + (count+1)*delay > now:
+                # the usual case, only the tick that got it due
+                loop.Count = count = count+1
+                callback = loop.Callback
+                if callback:
+                    try:
+                        callback(count)
+                    except Exception as e:
+                        print(f'error at loop {e}')
+                if loop.Active:
+                    again.append((start + count*delay, loop))
+                continue
+
+            owed = loop._owed(now)
+            if owed and loop.Coalesce:
+                loop.Count += owed
+                owed = 1
+            for _ in range(owed):
+                if not loop.Coalesce:
+                    loop.Count += 1
+                if loop.Callback:
+                    try:
+                        loop.Callback(loop.Count)
+                    except Exception as e:
+                        print(f'error at loop {e}')
+                if not loop.Active:
+                    break
+            if loop.Active:
+                again.append((start + loop.Count*delay, loop))
+    # after the pass, a loop without delay is due again right away
+    due = _DUE
+    for time, loop in again:
+        bucket = due.get(time)
+        if bucket is None:
+            due[time] = [loop]
+            heapq.heappush(_SCHEDULE, time)
+        else:
+            bucket.append(loop)
+
+    while _TIMEOUTS and _TIMEOUTS[0][0] <= now:
+        loop = heapq.heappop(_TIMEOUTS)[2]
+        loop.Active = False
+        LOOPS.pop(loop.Index, None)
 
 def update_all(dt: float):
+    if INTERPOLATE:
+        # only what moves in this update gets interpolated
+        _INTERP.clear()
     del_list = []
     for self in TWEENS.values():
         self.Time += dt
@@ -139,19 +681,9 @@ def update_all(dt: float):
     for v in del_list:
         del TWEENS[v]
 
-    del_list = []
-    for self in LOOPS.values():
-        self.Time += dt
-        if (self.Timeout and self.Time >= self.Timeout) or not self.Active:
-            del_list.append(self.Index)
-            continue
-        if self.Time >= (self.Count*self.Delay):
-            self.Count += 1
-            if self.Callback:
-                try:
-                    self.Callback(self.Count)
-                except Exception as e:
-                    print(f'error at loop {e}')
-                    continue
-    for v in del_list:
-        del LOOPS[v]
+    for pool in list(POOLS.values()):
+        pool.update(dt)
+    if _WRITES:
+        _flush_writes()
+
+    _update_loops(dt)
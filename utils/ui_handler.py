@@ -2,20 +2,336 @@ from __future__ import annotations
 import pygame
 import typing
 import uuid
+import bisect
+import weakref
+
+from . import font_handler
+from . import asset_handler
+from . import profile_handler
+from . import tween_handler
 
 UIOBJ: dict[str, UI] = {}
 
-def update_all(Event: list[pygame.event.Event], MousePos: tuple[int, int]):
-    # iterate through UI object first 
-    sort_stack = list(UIOBJ.values())
-    sort_stack.sort(key=lambda ui: ui.ZIndex)
+# elements set or drawn on since the last update_all, and the ones update_all has to position again
+_TOUCHED: set[UI] = set()
+_MOVED: set[UI] = set()
+# elements positioned inside another's Bounds, by id of that rect
+_CHILDREN: dict[int, weakref.WeakSet[UI]] = {}
+
+class _Tracked:
+    """
+    Attribute that notes the element changed when set. With no __get__ reading it
+    comes straight from the instance like a plain attribute
+    """
+    def __init__(self, moves: bool) -> None:
+        self.Moves = moves
+
+    def __set_name__(self, owner: type, name: str):
+        self.Name = name
+
+    def __set__(self, ui: UI, value: typing.Any):
+        ui.__dict__[self.Name] = value
+        _TOUCHED.add(ui)
+        if self.Moves:
+            _MOVED.add(ui)
+
+# retained render list, kept sorted by (ZIndex, order added to the stack)
+RENDER_STACK: list[UI] = []
+_STACK_COUNTER = 0
 
-    for v in sort_stack:
-        # keep updating position
-        v.ParentSurface.blit(*v.get_blit())
-        v._update_states(Event, MousePos)
+def _stack_key(ui: UI):
+    return (ui.ZIndex, ui._StackOrder)
+
+def _stack_insert(ui: UI):
+    """
+    Insert ui into the render stack, after anything with the same ZIndex
+    """
+    global _STACK_COUNTER
+    _STACK_COUNTER += 1
+    ui._StackOrder = _STACK_COUNTER
+    bisect.insort_right(RENDER_STACK, ui, key=_stack_key)
+
+def rebuild_stack():
+    """
+    Rebuilds the render stack from UIOBJ, only needed if UIOBJ was edited directly
+    """
+    RENDER_STACK.clear()
+    for v in UIOBJ.values():
+        _stack_insert(v)
+
+# dirty rect mode, off by default. see set_dirty_rects
+DIRTY_RECTS = False
+_DAMAGE: dict[pygame.Surface, list[pygame.Rect]] = {}
+
+def set_dirty_rects(state: bool):
+    """
+    Toggles dirty rect mode, update_all will only redraw regions that changed
+    and return them to pass to pygame.display.update
+    """
+    global DIRTY_RECTS
+    DIRTY_RECTS = state
+    _DAMAGE.clear()
+    for v in UIOBJ.values():
+        v._DrawnRect = None # forces everything to draw once
+    _TOUCHED.update(UIOBJ.values())
+
+def _add_damage(surface: pygame.Surface, rect: pygame.Rect):
+    if rect.width > 0 and rect.height > 0:
+        _DAMAGE.setdefault(surface, []).append(rect)
+
+def _merge_rects(rects: list[pygame.Rect]) -> list[pygame.Rect]:
+    """
+    Merges overlapping rects so no region gets drawn twice
+    """
+    merged: list[pygame.Rect] = []
+    for r in rects:
+        r = r.copy()
+        i = r.collidelist(merged)
+        while i != -1:
+            r.union_ip(merged.pop(i))
+            i = r.collidelist(merged)
+        merged.append(r)
+    return merged
+
+def _drawn_rect(ui: UI) -> pygame.Rect:
+    surf, dest, area = ui.get_blit()
+    return pygame.Rect(dest.topleft, area.clip(surf.get_rect()).size)
+
+def _changed(ui: UI, drawn: pygame.Rect) -> bool:
+    """
+    If ui moved, changed surface or draw area since it was last drawn
+    """
+    return ui._Dirty or drawn != ui._DrawnRect or ui.Surface is not ui._DrawnSurface or ui.DrawArea != ui._DrawnArea
+
+def _remember(ui: UI, drawn: pygame.Rect):
+    ui._DrawnRect = drawn
+    ui._DrawnSurface = ui.Surface
+    ui._DrawnArea = ui.DrawArea.copy()
+    ui._Dirty = False
+
+def needs_redraw() -> bool:
+    """
+    If anything was set, marked or shown/hidden since the last update_all. Setting a value
+    to what it already was still counts
+    """
+    return bool(_DAMAGE or _TOUCHED or _MOVED) or len(RENDER_STACK) != len(UIOBJ)
+
+def _draw_dirty(stack: list[UI]) -> list[pygame.Rect]:
+    """
+    Finds elements that moved, changed surface or draw area and redraws
+    the regions they left and entered, including whatever is underneath
+    """
+    for v in _TOUCHED:
+        if v.ID not in UIOBJ:
+            # hidden, set_visible damaged where it was
+            continue
+        drawn = _drawn_rect(v)
+        if _changed(v, drawn):
+            if v._DrawnRect is not None:
+                _add_damage(v.ParentSurface, v._DrawnRect)
+            _add_damage(v.ParentSurface, drawn)
+            _remember(v, drawn)
+    _TOUCHED.clear()
+
+    updated: list[pygame.Rect] = []
+    for target, rects in _DAMAGE.items():
+        layers = [v for v in stack if v.ParentSurface is target]
+        for r in _merge_rects(rects):
+            r = r.clip(target.get_rect())
+            if r.width <= 0 or r.height <= 0:
+                continue
+            target.set_clip(r)
+            target.blits([v.get_blit() for v in layers if r.colliderect(v._DrawnRect)], False)
+            updated.append(r)
+        target.set_clip(None)
+    _DAMAGE.clear()
+    return updated
+
+def update_all(Event: list[pygame.event.Event], MousePos: tuple[int, int]) -> typing.Union[list[pygame.Rect], None]:
+    """
+    Draws and updates all UI, returns the updated regions in dirty rect mode
+    """
+    if len(RENDER_STACK) != len(UIOBJ):
+        rebuild_stack()
+    # copy, events below can add or remove from the stack
+    stack = RENDER_STACK[:]
+
+    updated = None
+    if DIRTY_RECTS:
+        updated = _draw_dirty(stack)
+    else:
+        # one .blits call for each run of elements sharing a parent surface
+        target = None
+        batch = []
+        for v in stack:
+            if v.ParentSurface is not target:
+                if batch:
+                    target.blits(batch, False) #type: ignore
+                target = v.ParentSurface
+                batch = []
+            batch.append(v.get_blit())
+        if batch:
+            target.blits(batch, False) #type: ignore
+        _TOUCHED.clear()
+        _DAMAGE.clear()
+    profile_handler.PROFILER.mark('ui_blit')
+
+    dispatch_pointer(Event, MousePos)
+    # only what was moved, positioning one moves whatever sits inside it
+    while _MOVED:
+        _MOVED.pop().position()
+    profile_handler.PROFILER.mark('ui_state')
+    return updated
+
+# stage size everything was first laid out at, fonts are scaled by the height against it
+_STAGE_SIZE: typing.Union[tuple[int, int], None] = None
+STAGE_SCALE = 1.0
+_FONT_SIZES: dict[pygame.font.Font, int] = {}
+
+def scale_font(font: pygame.font.Font) -> pygame.font.Font:
+    """
+    Sets the point size of font to match STAGE_SCALE. Fonts are shared objects so
+    every user of the font gets the new size
+    """
+    if not hasattr(font, 'point_size'):
+        # needs pygame-ce, text keeps its size otherwise
+        return font
+    base = _FONT_SIZES.setdefault(font, font.point_size)
+    size = max(1, round(base*STAGE_SCALE))
+    if font.point_size != size:
+        font.point_size = size
+        font_handler.forget_font(font)
+    return font
+
+def rescale_stage(old_surface: pygame.Surface, new_surface: pygame.Surface, old_size: tuple[int, int]):
+    """
+    Moves every element drawn on old_surface (which was old_size) to new_surface and lays
+    it out again for the new size. Images are refit from their sources, nothing is reloaded
+    """
+    global _STAGE_SIZE, STAGE_SCALE
+    if _STAGE_SIZE is None:
+        _STAGE_SIZE = old_size
+    new_size = new_surface.get_size()
+    sx, sy = new_size[0]/old_size[0], new_size[1]/old_size[1]
+    STAGE_SCALE = new_size[1]/_STAGE_SIZE[1]
+    old_rect = pygame.Rect((0, 0), old_size)
+
+    texts: list[TextUI] = []
+    for v in UIOBJ.values():
+        if v.ParentSurface is not old_surface:
+            continue
+        v.ParentSurface = new_surface
+        if v.ParentRect == old_rect:
+            v.ParentRect = new_surface.get_rect()
+        v.PxPos = (v.PxPos[0]*sx, v.PxPos[1]*sy)
+        # a tween still easing the offset would put it back in old pixels
+        tween_handler.scale_property(v, 'PxPos', (sx, sy))
+        # sizes come from what they were at the first rescale so repeated ones do not drift
+        if v._StageBase is None:
+            v._StageBase = (old_size, v.ImageFitTuple, getattr(v, 'WrapWidth', 0))
+        base_size, fit, wrap = v._StageBase
+        bx, by = new_size[0]/base_size[0], new_size[1]/base_size[1]
+        if isinstance(v, TextUI):
+            v.WrapWidth = int(wrap*bx)
+            texts.append(v)
+        elif isinstance(v, ImageUI):
+            v.image_fit((int(fit[0]*bx), int(fit[1]*by)), fit[2])
         v.position()
 
+    # after the images, text can be parented to their bounds
+    for v in texts:
+        scale_font(v.Font)
+        v.Layout = None
+        v.set_text(v.Text, reveal=v.Revealed)
+
+    _DAMAGE.pop(old_surface, None)
+    for v in UIOBJ.values():
+        v._DrawnRect = None
+    _TOUCHED.update(UIOBJ.values())
+    _add_damage(new_surface, new_surface.get_rect())
+
+# pointer hit testing, visible elements are bucketed into a uniform grid by Bounds
+GRID_CELL = 128
+_GRID: dict[tuple[int, int], set[UI]] = {}
+HOVERED: set[UI] = set()
+_ACTIVE: list[UI] = []
+
+def _grid_cells(rect: tuple[int, int, int, int]):
+    x, y, w, h = rect
+    for cx in range(x//GRID_CELL, (x+max(w, 1)-1)//GRID_CELL + 1):
+        for cy in range(y//GRID_CELL, (y+max(h, 1)-1)//GRID_CELL + 1):
+            yield (cx, cy)
+
+def _grid_remove(ui: UI):
+    if ui._GridRect is None:
+        return
+    for cell in _grid_cells(ui._GridRect):
+        bucket = _GRID.get(cell)
+        if bucket is not None:
+            bucket.discard(ui)
+            if not bucket:
+                del _GRID[cell]
+    ui._GridRect = None
+
+def _grid_update(ui: UI):
+    """
+    Moves ui to the cells its bounds cover now, cheap when it has not moved
+    """
+    rect = (ui.Bounds.x, ui.Bounds.y, ui.Bounds.width, ui.Bounds.height)
+    if rect == ui._GridRect:
+        return
+    _grid_remove(ui)
+    for cell in _grid_cells(rect):
+        _GRID.setdefault(cell, set()).add(ui)
+    ui._GridRect = rect
+
+def hit_test(pos: tuple[int, int]) -> list[UI]:
+    """
+    Returns visible UI under pos, topmost first
+    """
+    bucket = _GRID.get((pos[0]//GRID_CELL, pos[1]//GRID_CELL))
+    if not bucket:
+        return []
+    hits = [v for v in bucket if v.Bounds.collidepoint(pos)]
+    hits.sort(key=_stack_key, reverse=True)
+    return hits
+
+def dispatch_pointer(Event: list[pygame.event.Event], MousePos: tuple[int, int]):
+    """
+    Updates hover and leave of elements entering or leaving the pointer and sends
+    clicks to the topmost element listening to onclick
+    """
+    hits = hit_test(MousePos)
+    hovered = set(hits)
+
+    for v in HOVERED - hovered:
+        v.Hovering = False
+        v.trigger_event('onleave')
+    for v in hits:
+        if v not in HOVERED:
+            v.Hovering = True
+            v.trigger_event('onhover')
+    HOVERED.clear()
+    HOVERED.update(hovered)
+
+    for v in _ACTIVE:
+        v.Active = False
+    _ACTIVE.clear()
+
+    clicks = 0
+    for ev in Event:
+        if ev.type == pygame.MOUSEBUTTONUP:
+            clicks += 1
+    if clicks == 0:
+        return
+    for v in hits:
+        if v.Events['onclick']:
+            v.Active = True
+            _ACTIVE.append(v)
+            for _ in range(clicks):
+                v.trigger_event('onclick')
+            break
+
 class UI_Event:
     """
     Wrapper for UI events _onclick, _onhover, _onleave
@@ -34,9 +350,21 @@ class UI:
     """
     Base class for all UI elements
     """
+    # setting these redraws the element, the moving ones also position it again on the next update_all.
+    # changing them in place does not, call mark_dirty or mark_moved after
+    Surface = _Tracked(False)
+    ParentSurface = _Tracked(False)
+    Bounds = _Tracked(True)
+    DrawArea = _Tracked(True)
+    ScaledPos = _Tracked(True)
+    PxPos = _Tracked(True)
+    Anchor = _Tracked(True)
+
     def __init__(self, parent_rect: pygame.Rect, parent_surf: pygame.Surface, bounds: typing.Union[pygame.Rect, None] = None) -> None:
         if bounds is None:
             bounds = pygame.Rect(10, 10, 100, 50)
+        self._ZIndex = 0
+        self._StackOrder = 0
         self.Bounds = bounds
         self.Hovering = False
         self.Active = False
@@ -51,6 +379,14 @@ class UI:
         self.ImageFitTuple = (bounds.width, bounds.height, 'x')
         self.OnStack = True
         self.ZIndex = 0
+
+        # dirty rect tracking, what was last drawn to the parent surface
+        self._Dirty = True
+        self._DrawnRect: typing.Union[pygame.Rect, None] = None
+        self._DrawnSurface: typing.Union[pygame.Surface, None] = None
+        self._DrawnArea: typing.Union[pygame.Rect, None] = None
+        # stage size, fit and wrap width before the first rescale_stage
+        self._StageBase: typing.Union[tuple, None] = None
         
         self.Events: dict[typing.Literal['onhover', 'onleave', 'onclick'], dict[str, UI_Event]] = {
             'onhover': {},
@@ -61,40 +397,42 @@ class UI:
         self.Bounds.x, self.Bounds.y = self.ParentRect.x+self.Bounds.x, self.ParentRect.y+self.Bounds.y
 
         UIOBJ[self.ID] = self
+        _stack_insert(self)
+        self._GridRect: typing.Union[tuple[int, int, int, int], None] = None
+        _grid_update(self)
 
-    def _update_states(self, event: list[pygame.event.Event], mousepos: tuple[int, int]):
-        """
-        Update onhover, onleave, onclick events and trigger any events binded to them
-        """
-        collided = self.Bounds.collidepoint(mousepos)
-
-        def trigger_event(ev_name: typing.Literal['onhover', 'onleave', 'onclick']):
-            for v in self.Events[ev_name].values():
-                try:
-                    v.func()
-                except Exception as e:
-                    print(f'exception at ui {e}')
-
-        #update onhover
-        if not self.Hovering and collided:
-            self.Hovering = True
-            trigger_event('onhover')
-        elif not collided:
-            if self.Hovering:
-                trigger_event('onleave')
-            self.Hovering = False
-
-        active = False
-        if collided:
-            for ev in event:
-                if ev.type == pygame.MOUSEBUTTONUP:
-                    trigger_event('onclick')
-                    active = True
-        if active:
-            self.Active = True
+    @property
+    def ZIndex(self) -> int:
+        return self._ZIndex
+
+    @ZIndex.setter
+    def ZIndex(self, value: int):
+        if value == self._ZIndex:
+            return
+        self._ZIndex = value
+        if self.ID not in UIOBJ:
+            return
+        try:
+            RENDER_STACK.remove(self)
+        except ValueError:
+            # UIOBJ was edited directly and the stack is behind it
+            rebuild_stack()
         else:
-            self.Active = False
-    
+            # keep the original order against elements with the same ZIndex
+            bisect.insort_right(RENDER_STACK, self, key=_stack_key)
+        # whatever overlaps it is now drawn in a different order
+        self.mark_dirty()
+
+    def trigger_event(self, ev_name: typing.Literal['onhover', 'onleave', 'onclick']):
+        """
+        Calls every event binded to ev_name
+        """
+        for v in list(self.Events[ev_name].values()):
+            try:
+                v.func()
+            except Exception as e:
+                print(f'exception at ui {e}')
+
     def set_visible(self, state: bool):
         """
         Toggles ui element from render stack
@@ -102,11 +440,58 @@ class UI:
         if state:
             if not self.OnStack:
                 UIOBJ[self.ID] = self
+                _stack_insert(self)
+                _grid_update(self)
                 self.OnStack = True
+                _TOUCHED.add(self)
         else:
             if self.ID in UIOBJ:
                 self.OnStack = False
                 del UIOBJ[self.ID]
+                RENDER_STACK.remove(self)
+                _grid_remove(self)
+                if self in HOVERED:
+                    HOVERED.discard(self)
+                    self.Hovering = False
+                if self._DrawnRect is not None:
+                    _add_damage(self.ParentSurface, self._DrawnRect)
+                    self._DrawnRect = None
+                elif not DIRTY_RECTS:
+                    # nothing to erase, only lets needs_redraw know
+                    _add_damage(self.ParentSurface, self.Bounds.copy())
+
+    def mark_dirty(self, area: typing.Union[pygame.Rect, None] = None):
+        """
+        Forces the element to redraw, call after drawing onto .Surface directly.
+        area limits the redraw to a part of .Surface
+        """
+        if area is None or self._DrawnRect is None:
+            self._Dirty = True
+            _TOUCHED.add(self)
+            return
+        area = area.clip(self.DrawArea).move(self.Bounds.x-self.DrawArea.x, self.Bounds.y-self.DrawArea.y)
+        _add_damage(self.ParentSurface, area)
+
+    def mark_moved(self):
+        """
+        Positions the element again on the next update_all, call after changing Bounds,
+        DrawArea or what it is positioned inside directly
+        """
+        _TOUCHED.add(self)
+        _MOVED.add(self)
+
+    @property
+    def ParentRect(self) -> pygame.Rect:
+        return self._ParentRect
+
+    @ParentRect.setter
+    def ParentRect(self, rect: pygame.Rect):
+        old = self.__dict__.get('_ParentRect')
+        if old is not None and id(old) in _CHILDREN:
+            _CHILDREN[id(old)].discard(self)
+        self._ParentRect = rect
+        _CHILDREN.setdefault(id(rect), weakref.WeakSet()).add(self)
+        self.mark_moved()
 
     def _onhover(self, ev: UI_Event):
         """
@@ -150,6 +535,7 @@ class UI:
         surfRect = self.Surface.get_rect()
         self.Bounds.width, self.Bounds.height = surfRect.width, surfRect.height
         self.DrawArea.width, self.DrawArea.height = surfRect.width, surfRect.height
+        self.mark_moved()
 
     def resize(self, size: tuple[int, int]):
         """
@@ -182,8 +568,7 @@ class UI:
             newY = newX/ratio
         else:
             newX = newY/ratio
-        self.Surface = pygame.transform.smoothscale(self.Surface, (newX, newY))
-        self.update_rect_size()
+        self.resize((int(newX), int(newY)))
 
     def set_anchor(self, coordinate: tuple[float, float]=(0, 0)):
         """
@@ -219,8 +604,16 @@ class UI:
         cx, cy = cx-ax, cy-ay
         self.Bounds.x, self.Bounds.y = int(cx), int(cy)
 
-        self.ScaledPos = coordinate_scale
-        self.PxPos = coordinate_px
+        # straight into the instance, this is the positioning they would ask for
+        self.__dict__['ScaledPos'] = coordinate_scale
+        self.__dict__['PxPos'] = coordinate_px
+        _MOVED.discard(self)
+        _TOUCHED.add(self)
+        children = _CHILDREN.get(id(self.Bounds))
+        if children:
+            _MOVED.update(children)
+        if self.OnStack:
+            _grid_update(self)
     
     def get_blit(self):
         """
@@ -238,11 +631,18 @@ class TextUI(UI):
         if not pygame.font.match_font("Aller"):
             print("The Aller_RG font is not installed on your computer, download it online PLEASEEEEE, using given")
 
-        self.Font = font
+        self.Font = scale_font(font)
         self.FG = (255, 255, 255, 255)
         self.BG = None
         self.Text = ""
         self.Lines = []
+        self.Layout: typing.Union[font_handler.TextLayout, None] = None
+        # characters shown so far when typing out text, None shows everything
+        self.Revealed: typing.Union[int, None] = None
+        self.FullSurface: typing.Union[pygame.Surface, None] = None
+        # while revealing, each line's outline and the text on its own, see _reveal
+        self.LineSurfaces: list[pygame.Surface] = []
+        self.TextLayer: typing.Union[pygame.Surface, None] = None
         self.BorderColor = (0, 0, 0)
         self.BorderThick = 1
         self.WrapWidth = parent_rect.width
@@ -255,31 +655,21 @@ class TextUI(UI):
 
         self.BorderColor = color
         self.BorderThick = thickness
-        self.set_text(self.Text)
+        self.render_layout()
 
     def draw_border(self, tosurface: pygame.Surface):
         """
-        Already being called within set_text
+        Already being called within render_layout
         """
-        #Improve this, border will be slower on higher numbers
-        for i in range(-self.BorderThick, self.BorderThick+1):
-            for j in range(-self.BorderThick, self.BorderThick+1):
-                if i == j == 0:
-                    continue
-                for li, line in enumerate(self.Lines):
-                    txt_surf = self.Font.render(line, True, self.BorderColor)
-
-                    x_offset = self.BorderThick
-                    line_size = self.Font.size(line)
-                    if self.Alignment == 'center':
-                        x_offset += (self.WrapWidth-line_size[0])//2
-                    elif self.Alignment == 'right':
-                        x_offset += self.WrapWidth-line_size[0]
-                    else: # do nothing on left
-                        pass
-
-                    offset_pos = (i*self.BorderThick + x_offset, j*self.BorderThick + self.BorderThick + li*self.Font.get_linesize())
-                    tosurface.blit(txt_surf, offset_pos)
+        if self.BorderThick <= 0 or self.Layout is None:
+            return
+        # past the thickness of padding the outline is clipped, except into neighbouring lines
+        shift = self.BorderThick - font_handler.outline_reach(self.BorderThick)
+        for line in self.Layout.Lines:
+            if not line.Text:
+                continue
+            outline = font_handler.render_outline(self.Font, line.Text, self.BorderThick, self.BorderColor)
+            tosurface.blit(outline, (line.X + shift, line.Y + shift))
 
     def flip_image(self, x: bool, y: bool):
         """
@@ -287,50 +677,66 @@ class TextUI(UI):
         """
         self.Surface = pygame.transform.flip(self.Surface, x, y)
     
-    def set_text(self, text: str, wrap: typing.Union[int, None] = None):
+    def set_text(self, text: str, wrap: typing.Union[int, None] = None, reveal: typing.Union[int, None] = None):
         """
-        Sets the text to str
+        Sets the text to str, explicit newlines are kept.
+        reveal only shows that many characters for now, see reveal_to
         """
-        words = text.split(' ')
-        self.Lines = []
-        currentline = ''
-
+        self.Revealed = reveal
         if wrap is None:
             self.WrapWidth: int = self.WrapWidth
         else:
             self.WrapWidth = wrap
 
-        for word in words:
-            cacheline = currentline + f"{word} "
-            size_x, _ = self.Font.size(cacheline)
-            if size_x >= self.WrapWidth:
-                self.Lines.append(currentline)
-                currentline = f"{word} "
-            else:
-                currentline = cacheline
-        self.Lines.append(currentline)
- 
-        boundHeight = self.Font.get_linesize() * len(self.Lines)
-        self.Text = "\n".join(self.Lines)
-
-        text_surf = pygame.Surface((self.WrapWidth + self.BorderThick*2, boundHeight + self.BorderThick*2), pygame.SRCALPHA)
-        self.draw_border(text_surf)
-        
-        for i, line in enumerate(self.Lines):
-            txt_surf = self.Font.render(line, True, self.FG, self.BG)
+        if self.Layout is None or not self.Layout.matches(self.Font, text, self.WrapWidth):
+            self.Layout = font_handler.TextLayout(self.Font, text, self.WrapWidth)
+        self.render_layout()
 
-            x_offset = self.BorderThick
-            line_size = self.Font.size(line)
-            if self.Alignment == 'center':
-                x_offset += (self.WrapWidth-line_size[0])//2
-            elif self.Alignment == 'right':
-                x_offset += self.WrapWidth-line_size[0]
-            else: # do nothing on left
-                pass
+    def render_layout(self):
+        """
+        Draws the current layout, without wrapping the text again
+        """
+        if self.Layout is None:
+            self.set_text(self.Text)
+            return
+        layout = self.Layout
+        layout.align(self.Alignment)
+        self.Text = layout.Text
+        self.Lines = [line.Text for line in layout.Lines]
 
-            text_surf.blit(txt_surf, (x_offset, self.BorderThick + (i*self.Font.get_linesize())))
+        revealing = self.Revealed is not None and self.Revealed < len(layout.Text)
+        text_surf = pygame.Surface((self.WrapWidth + self.BorderThick*2, layout.Height + self.BorderThick*2), pygame.SRCALPHA)
+        self.draw_border(text_surf)
 
-        self.Surface = text_surf
+        # revealing keeps the text apart from the outlines, _reveal stacks them the same way
+        text_layer = pygame.Surface(text_surf.get_size(), pygame.SRCALPHA) if revealing else text_surf
+        atlas = font_handler.get_atlas(self.Font, self.FG)
+        for line in layout.Lines:
+            atlas.render_to(text_layer, line.Text, (self.BorderThick + line.X, self.BorderThick + line.Y), self.BG)
+
+        self.FullSurface = text_surf
+        self.LineSurfaces = []
+        self.TextLayer = None
+        if not revealing:
+            self.Surface = text_surf
+        else:
+            text_surf.blit(text_layer, (0, 0))
+            self.TextLayer = text_layer
+            # every line's outline on its own, so revealing one never uncovers the outline of the next.
+            # row 0 is where the outline starts, reach px above the line's padding
+            reach = font_handler.outline_reach(self.BorderThick)
+            line_height = font_handler.get_metrics(self.Font).Height + reach*2
+            shift = self.BorderThick - reach
+            for line in layout.Lines:
+                line_surf = pygame.Surface((text_surf.get_width(), line_height), pygame.SRCALPHA)
+                if line.Text and self.BorderThick > 0:
+                    line_surf.blit(font_handler.render_outline(self.Font, line.Text, self.BorderThick, self.BorderColor), (line.X + shift, 0))
+                self.LineSurfaces.append(line_surf)
+
+            # start empty, the final layout and size are kept while typing
+            self.Surface = pygame.Surface(text_surf.get_size(), pygame.SRCALPHA)
+            self._reveal(0, self.Revealed)
+        self.mark_dirty()
         self.Bounds = self.Surface.get_rect()
         self.Bounds.width += self.BorderThick*2
         self.Bounds.height += self.BorderThick*2
@@ -339,6 +745,54 @@ class TextUI(UI):
         self.update_rect_size()
         self.position()
 
+    def reveal_to(self, count: int):
+        """
+        Shows the first count characters of text set with reveal, only the new part gets copied
+        """
+        if self.Revealed is None or self.Layout is None or self.FullSurface is None:
+            return
+        count = min(count, len(self.Layout.Text))
+        if count <= self.Revealed:
+            return
+        if count == len(self.Layout.Text):
+            # done, swap in the fully drawn text
+            self.Surface = self.FullSurface
+            self.LineSurfaces = []
+            self.TextLayer = None
+            self.mark_dirty()
+        else:
+            self._reveal(self.Revealed, count)
+        self.Revealed = count
+
+    def _reveal(self, start: int, end: int):
+        """
+        Draws the area of characters start..end again from the line outlines and text layer
+        """
+        if self.Layout is None or self.FullSurface is None or self.TextLayer is None:
+            return
+        bounds = self.FullSurface.get_rect()
+        # areas reach into the lines around them, so everything shown up to end is stacked
+        # again inside them: outlines in line order, then the text over all of them
+        shown = [(li, area.clip(bounds)) for li, area in self.Layout.reveal_rects(0, end, self.BorderThick)]
+        top = self.BorderThick - font_handler.outline_reach(self.BorderThick)
+        height = self.Layout.Metrics.Height
+        # text only from its own line's rows, the outline reaches into the next one's
+        text = [area.clip(area.x, self.Layout.Lines[li].Y + self.BorderThick, area.width, height) for li, area in shown]
+        for _, area in self.Layout.reveal_rects(start, end, self.BorderThick):
+            area = area.clip(bounds)
+            if not area:
+                continue
+            self.Surface.fill((0, 0, 0, 0), area)
+            for li, part in shown:
+                part = part.clip(area)
+                if part:
+                    self.Surface.blit(self.LineSurfaces[li], part, part.move(0, -(self.Layout.Lines[li].Y + top)))
+            for part in text:
+                part = part.clip(area)
+                if part:
+                    self.Surface.blit(self.TextLayer, part, part)
+            self.mark_dirty(area)
+
     def get_text(self):
         """
         Get current displayed text (if .Text is not modified)
@@ -347,9 +801,9 @@ class TextUI(UI):
     
     def change_font(self, font: pygame.font.Font):
         """
-        Changes the font and redraws text
+        Changes the font and redraws text, wraps again since the widths change
         """
-        self.Font = font
+        self.Font = scale_font(font)
         self.set_text(self.Text)
 
     def change_colors(self, bg, fg):
@@ -358,7 +812,7 @@ class TextUI(UI):
         """
         self.BG = bg
         self.FG = fg
-        self.set_text(self.Text)
+        self.render_layout()
 
 class ImageUI(UI):
     """
@@ -366,14 +820,46 @@ class ImageUI(UI):
     """
     def __init__(self, parent_rect: pygame.Rect, parent_surf: pygame.Surface, source: str, bounds: typing.Union[pygame.Rect, None] = None) -> None:
         super().__init__(parent_rect, parent_surf, bounds)
-        self.Surface = pygame.image.load(source)
-        self.Surface = self.Surface.convert_alpha()
+        self.Asset = asset_handler.ASSETS.acquire(source)
+        self.Mips = self.Asset.Mips
+        self.Surface = self.Mips.Source
         self.Bounds = self.Surface.get_rect()
+        self.ImageFitTuple = (self.Bounds.width, self.Bounds.height, 'x')
+
+    def resize(self, size: tuple[int, int]):
+        """
+        Resizes the image to given coordinate without constraint, always scaled from the source
+        """
+        self.Surface = self.Mips.get(size)
+        self.update_rect_size()
+
+    def image_fit(self, size: tuple[int, int], keep: typing.Literal['x', 'y'] = 'x'):
+        """
+        Fit the image into a given axis while keeping its aspect ratio
+        """
+        # same result as resize then resize_ratio, in one scale. the ratio comes from the
+        # source so fitting again never picks up rounding from the last fit
+        ratio = self.Mips.Source.get_width()/self.Mips.Source.get_height()
+        if keep == 'x':
+            fit = (size[0], size[0]/ratio)
+        else:
+            fit = (size[1]/ratio, size[1])
+        self.resize((int(fit[0]), int(fit[1])))
+        self.ImageFitTuple = (*size, keep) #keep reference
 
     def replace_image(self, source: str):
         """
         Replaces image and resizes it to match original image
         """
-        self.Surface = pygame.image.load(source)
-        self.Surface = self.Surface.convert_alpha()
-        self.resize((self.Bounds.width, self.Bounds.height))
\ No newline at end of file
+        old = self.Asset
+        self.Asset = asset_handler.ASSETS.acquire(source)
+        self.Mips = self.Asset.Mips
+        asset_handler.ASSETS.release(old)
+        self.resize((self.Bounds.width, self.Bounds.height))
+
+    def unload(self):
+        """
+        Hides the element and lets go of its image, do not use it after
+        """
+        self.set_visible(False)
+        asset_handler.ASSETS.release(self.Asset)
\ No newline at end of file